@@ -1,34 +1,277 @@
-from flask import Flask, request, jsonify, send_from_directory, render_template, session, redirect, url_for, flash, Response
+from flask import Flask, request, jsonify, send_from_directory, render_template, session, redirect, url_for, flash, Response, stream_with_context, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_migrate import Migrate, stamp, upgrade
+from sqlalchemy.dialects.sqlite import dialect as sqlite_dialect
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 import os
-from datetime import datetime, timedelta
-import uuid
+from datetime import datetime, timedelta, timezone
+import base64
+import click
+import atexit
+import hashlib
+import hmac
+import html
+import json
+import logging
+import mimetypes
+import threading
+import time
 import jwt
 import xml.etree.ElementTree as ET
+from collections import Counter, namedtuple
+from urllib.parse import urlencode
+from cache import LRUCache, LocalSharedClient, ResponseCache, SharedCache
+from passwords import HasherBusy, PasswordHasher
+from storage import ContentStore, is_hashed_name, normalize_extension
+from images import DerivativeGenerator
+from metrics import RequestMetrics
+from writequeue import QueueFull, WriteBehindQueue
+from tagindex import TagIndex
+from jsonprovider import OrjsonProvider
+from compress import compress, compress_stream, is_compressible, supported_encodings
+from database import (READ_BIND, RoutingSession, engine_options_from_env, install_sqlite_pragmas,
+                      read_only, read_pragmas, sqlite_pragmas_from_env)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['JWT_SECRET_KEY'] = 'jwt-secret-string'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///blog.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///blog.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads'
+# Optional read replica (or, for SQLite, a read-only handle on the same file);
+# public list/detail/feed reads are routed there, everything else uses the primary
+app.config['DATABASE_READ_URL'] = os.environ.get('DATABASE_READ_URL')
+if app.config['DATABASE_READ_URL']:
+    app.config['SQLALCHEMY_BINDS'] = {READ_BIND: app.config['DATABASE_READ_URL']}
+# Connection pool sizing (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+# DB_POOL_RECYCLE, DB_POOL_PRE_PING); unset values keep SQLAlchemy's defaults
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env()
+# Applied to each new SQLite connection; override with SQLITE_<NAME>
+app.config['SQLITE_PRAGMAS'] = sqlite_pragmas_from_env()
+# Request instrumentation: queries slower than this are kept in the slow
+# query log; METRICS_TOKEN lets a scraper read /api/admin/metrics without an
+# admin session
+app.config['SLOW_QUERY_THRESHOLD'] = float(os.environ.get('SLOW_QUERY_MS', 100)) / 1000
+app.config['SLOW_QUERY_LOG_SIZE'] = 100
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# The server entry points (`python app.py`, asgi.py) apply pending migrations
+# before serving; turn off when several processes share the database and run
+# `flask db upgrade` as a deploy step instead. Importing the app never migrates.
+app.config['AUTO_MIGRATE'] = os.environ.get('AUTO_MIGRATE', '1') != '0'
+app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', os.path.join(app.root_path, 'uploads'))
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Response cache: 'local' (per-process LRU) or 'shared' (redis URL, or an
+# in-memory stand-in when no URL is configured)
+app.config['RESPONSE_CACHE_BACKEND'] = os.environ.get('RESPONSE_CACHE_BACKEND', 'local')
+app.config['RESPONSE_CACHE_URL'] = os.environ.get('RESPONSE_CACHE_URL')
+app.config['RESPONSE_CACHE_MAX_ENTRIES'] = 1024
+app.config['RESPONSE_CACHE_TTL'] = 60  # seconds
+app.config['IDENTITY_CACHE_MAX_ENTRIES'] = 10000
+app.config['IDENTITY_CACHE_TTL'] = 300  # seconds, never longer than the token itself
+# Password hashing runs on a bounded pool; stored hashes made with other
+# parameters are upgraded on the next successful login
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+app.config['PASSWORD_HASH_EXECUTOR'] = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')  # or 'process'
+# Tag index: trending scores halve every TAG_TRENDING_HALF_LIFE_HOURS; the
+# index is rebuilt from post_tags every TAG_INDEX_RELOAD_SECONDS (0 = never)
+# to pick up writes made by other processes
+app.config['TAG_TRENDING_HALF_LIFE_HOURS'] = float(os.environ.get('TAG_TRENDING_HALF_LIFE_HOURS', 24))
+app.config['TAG_INDEX_RELOAD_SECONDS'] = int(os.environ.get('TAG_INDEX_RELOAD_SECONDS', 300))
+# Comment ingestion: 'sync' commits each comment in its request; 'queued'
+# accepts it into a bounded in-process queue that a background thread writes
+# in batches (see WriteBehindQueue for the guarantees)
+app.config['COMMENT_WRITE_MODE'] = os.environ.get('COMMENT_WRITE_MODE', 'sync')
+app.config['COMMENT_QUEUE_MAX_BATCH'] = int(os.environ.get('COMMENT_QUEUE_MAX_BATCH', 200))
+app.config['COMMENT_QUEUE_MAX_DELAY_MS'] = int(os.environ.get('COMMENT_QUEUE_MAX_DELAY_MS', 50))
+app.config['COMMENT_QUEUE_MAX_PENDING'] = int(os.environ.get('COMMENT_QUEUE_MAX_PENDING', 10000))
+# JSON encoding: 'orjson' (falls back to the stdlib when orjson isn't
+# installed) or 'stdlib' for Flask's default provider
+app.config['JSON_PROVIDER'] = os.environ.get('JSON_PROVIDER', 'orjson')
+if app.config['JSON_PROVIDER'] == 'orjson':
+    app.json = OrjsonProvider(app)
+# Response compression: the first of COMPRESSION_ENCODINGS the client accepts
+# is used (zstd and br only when the zstandard / brotli packages are
+# installed); bodies under COMPRESSION_MIN_SIZE bytes are sent as they are
+app.config['COMPRESSION_ENCODINGS'] = supported_encodings(
+    tuple(name.strip() for name in os.environ.get('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',') if name.strip())
+)
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
 
 # CORS configuration
+app.config['CORS_ORIGIN'] = 'http://localhost:3000'
 CORS(app, resources={r"/api/*": {
-    "origins": "http://localhost:3000",
+    "origins": app.config['CORS_ORIGIN'],
     "supports_credentials": True,
     "allow_headers": ["Content-Type", "Authorization"],
     "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
 }})
 
-# Ensure upload directory exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Resized variants of uploaded images (requires Pillow)
+app.config['IMAGE_VARIANT_WIDTHS'] = (320, 800, 1600)
+app.config['IMAGE_VARIANT_FORMAT'] = 'webp'
+app.config['IMAGE_WORKERS'] = int(os.environ.get('IMAGE_WORKERS', 2))
+
+# How /uploads bytes are sent: 'direct' (send_file, which uses the server's
+# wsgi.file_wrapper/sendfile), 'x-sendfile' (X-Sendfile header for Apache/
+# lighttpd) or 'x-accel' (X-Accel-Redirect into an nginx internal location)
+app.config['UPLOADS_SERVE_MODE'] = os.environ.get('UPLOADS_SERVE_MODE', 'direct')
+app.config['UPLOADS_ACCEL_PREFIX'] = os.environ.get('UPLOADS_ACCEL_PREFIX', '/protected-uploads/')
+app.config['USE_X_SENDFILE'] = app.config['UPLOADS_SERVE_MODE'] == 'x-sendfile'
+
+# Uploads are stored under their content hash; the directory is created here
+upload_store = ContentStore(app.config['UPLOAD_FOLDER'])
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+migrate = Migrate(app, db, directory=os.path.join(app.root_path, 'migrations'), render_as_batch=True)
+
+# Request instrumentation
+# Every statement is timed on the engine; inside a request the count and
+# total are accumulated on ``g`` and recorded per route when the response
+# goes out, along with a Server-Timing header.
+request_metrics = RequestMetrics(
+    slow_query_threshold=app.config['SLOW_QUERY_THRESHOLD'],
+    slow_query_log_size=app.config['SLOW_QUERY_LOG_SIZE'],
+    source_root=app.root_path
+)
+slow_query_logger = logging.getLogger('blog.slow_queries')
+
+def current_route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
 
-db = SQLAlchemy(app)
+def install_query_timing(engine):
+    @db.event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @db.event.listens_for(engine, 'after_cursor_execute')
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        route = None
+        # Set by the async entry point (asgi.py), which has no Flask request
+        stats = conn.info.get('request_stats')
+        if stats is not None:
+            stats['queries'] += 1
+            stats['time'] += elapsed
+            route = stats['route']
+        elif has_request_context():
+            g.sql_queries = g.get('sql_queries', 0) + 1
+            g.sql_time = g.get('sql_time', 0.0) + elapsed
+            route = current_route()
+        if request_metrics.is_slow(elapsed):
+            entry = request_metrics.record_slow_query(statement, parameters, elapsed, route)
+            slow_query_logger.warning('slow query (%.1fms) at %s: %s',
+                                      entry['duration_ms'], entry['call_site'], statement)
+
+    @db.event.listens_for(engine, 'handle_error')
+    def discard_query_timer(exception_context):
+        if exception_context.connection is not None:
+            started = exception_context.connection.info.get('query_started')
+            if started:
+                started.pop()
+
+with app.app_context():
+    for engine in db.engines.values():
+        install_sqlite_pragmas(engine, app.config['SQLITE_PRAGMAS'])
+        install_query_timing(engine)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    duration = time.perf_counter() - started
+    queries = g.get('sql_queries', 0)
+    db_time = g.get('sql_time', 0.0)
+    request_metrics.record_request(request.method, current_route(), response.status_code,
+                                   duration, db_time, queries)
+    # Streamed bodies are still being produced, so this covers the view only
+    response.headers['Server-Timing'] = (
+        f'db;dur={db_time * 1000:.1f};desc="{queries} queries", app;dur={duration * 1000:.1f}'
+    )
+    return response
+
+# Response compression
+# Text responses are encoded with the best encoding the client accepts, and
+# streamed bodies are compressed as they are produced. Views whose output is
+# cached (the response cache, the RSS feed) store the encoded bytes and set
+# Content-Encoding themselves, so hot responses aren't recompressed per
+# request.
+def negotiated_encoding(accept=None):
+    """The encoding to use for ``accept`` (default: the request's Accept-Encoding)."""
+    accept = request.accept_encodings if accept is None else accept
+    encodings = app.config['COMPRESSION_ENCODINGS']
+    if not encodings or not accept:
+        return None
+    return accept.best_match(encodings)
+
+def encode_body(body, encoding):
+    """Return (content_encoding, bytes); small bodies stay uncompressed."""
+    if encoding is None or len(body) < app.config['COMPRESSION_MIN_SIZE']:
+        return None, body
+    return encoding, compress(body, encoding)
+
+@app.after_request
+def compress_response(response):
+    if not is_compressible(response.mimetype):
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.cache_control.no_transform):
+        return response
+    encoding = negotiated_encoding()
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        source = response.response
+        response.response = compress_stream(response.iter_encoded(), encoding)
+        if hasattr(source, 'close'):
+            response.call_on_close(source.close)
+        response.content_length = None
+    else:
+        encoding, body = encode_body(response.get_data(), encoding)
+        if encoding is None:
+            return response
+        response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Same content in different bytes, so only a weak validator still holds
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.cli.command('db-profile')
+def db_profile_command():
+    """Show the effective engine settings for each bind."""
+    for key, engine in db.engines.items():
+        print(f"{key or 'primary'}: {engine.url.render_as_string(hide_password=True)} "
+              f"pool={engine.pool.status()}")
+        if engine.dialect.name == 'sqlite':
+            for name, value in read_pragmas(engine, app.config['SQLITE_PRAGMAS']).items():
+                print(f'  {name} = {value}')
+
+password_hasher = PasswordHasher(
+    method=app.config['PASSWORD_HASH_METHOD'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+    executor=app.config['PASSWORD_HASH_EXECUTOR']
+)
+
+@app.errorhandler(HasherBusy)
+@app.errorhandler(QueueFull)
+def handle_server_busy(e):
+    response = jsonify({'error': 'Server is busy, please retry'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
 
 # JWT Token functions
 def generate_token(user_id):
@@ -38,15 +281,97 @@ def generate_token(user_id):
     }
     return jwt.encode(payload, app.config['JWT_SECRET_KEY'], algorithm='HS256')
 
-def verify_token(token):
+def decode_token(token):
     try:
-        payload = jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-        return payload['user_id']
+        return jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+def verify_token(token):
+    payload = decode_token(token)
+    return payload['user_id'] if payload else None
+
+# Authenticated identity cache
+# Verified tokens map to a lightweight identity so authenticated requests skip
+# both the JWT decode and the user lookup. Entries never outlive the token,
+# and bumping a user's generation invalidates all of their cached tokens.
+CurrentUser = namedtuple('CurrentUser', ['id', 'username', 'email'])
+
+identity_cache = LRUCache(app.config['IDENTITY_CACHE_MAX_ENTRIES'], app.config['IDENTITY_CACHE_TTL'])
+_identity_generations = {}
+_revoked_tokens = {}  # token digest -> expiry
+_identity_lock = threading.Lock()
+
+def _token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def invalidate_user_identity(user_id):
+    with _identity_lock:
+        _identity_generations[user_id] = _identity_generations.get(user_id, 0) + 1
+
+def revoke_token(token):
+    payload = decode_token(token)
+    if not payload:
+        return
+    now = datetime.utcnow()
+    with _identity_lock:
+        # Expired tokens fail verification anyway, so drop them from the list
+        for digest, expires_at in list(_revoked_tokens.items()):
+            if expires_at <= now:
+                del _revoked_tokens[digest]
+        _revoked_tokens[_token_digest(token)] = datetime.utcfromtimestamp(payload['exp'])
+    identity_cache.delete(_token_digest(token))
+
+def is_token_revoked(token):
+    return _token_digest(token) in _revoked_tokens
+
+def resolve_identity(token):
+    """Return the CurrentUser for a valid token, or None."""
+    if is_token_revoked(token):
+        return None
+    
+    key = _token_digest(token)
+    cached = identity_cache.get(key)
+    if cached is not None:
+        identity, generation = cached
+        if _identity_generations.get(identity.id, 0) == generation:
+            return identity
+    
+    payload = decode_token(token)
+    if not payload:
+        return None
+    generation = _identity_generations.get(payload['user_id'], 0)
+    user = db.session.get(User, payload['user_id'])
+    if user is None:
+        return None
+    
+    identity = CurrentUser(user.id, user.username, user.email)
+    ttl = min(app.config['IDENTITY_CACHE_TTL'], payload['exp'] - datetime.now(timezone.utc).timestamp())
+    if ttl > 0:
+        identity_cache.set(key, (identity, generation), ttl)
+    return identity
+
+@db.event.listens_for(db.session, 'after_flush')
+def track_identity_changes(session, flush_context):
+    changed = session.info.setdefault('changed_users', set())
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj):
+            changed.add(obj.id)
+
+@db.event.listens_for(db.session, 'after_commit')
+def expire_changed_identities(session):
+    for user_id in session.info.pop('changed_users', ()):
+        invalidate_user_identity(user_id)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def discard_identity_changes(session):
+    session.info.pop('changed_users', None)
+
 def token_required(f):
     from functools import wraps
     @wraps(f)
@@ -62,13 +387,14 @@ def token_required(f):
         if not token:
             return jsonify({'error': 'Token is missing'}), 401
         
-        user_id = verify_token(token)
-        if not user_id:
+        identity = resolve_identity(token)
+        if identity is None:
             return jsonify({'error': 'Invalid or expired token'}), 401
         
         # Set current_user for the function
         from flask import g
-        g.current_user = User.query.get(user_id)
+        g.current_user = identity
+        g.token = token
         return f(*args, **kwargs)
     return decorated
 
@@ -77,14 +403,24 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalized counters, maintained by update_counters()
+    posts_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments_received = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not password_hasher.verify(self.password_hash, password):
+            return False
+        # Upgrade hashes made with older KDF parameters while we have the plaintext
+        if password_hasher.needs_rehash(self.password_hash):
+            self.password_hash = password_hasher.hash(password)
+            password_hasher.record_rehash()
+        return True
 
 class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -94,11 +430,22 @@ class Post(db.Model):
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    comments_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Filled in by listings that ask for a preview instead of the full body
+    excerpt = db.query_expression()
     
     author = db.relationship('User', backref='posts')
     comments = db.relationship('Comment', backref='post', lazy=True, cascade='all, delete-orphan')
     tags = db.relationship('Tag', secondary='post_tags', backref='posts')
 
+    # Listings and the feed order by (created_at, id); dashboards filter by
+    # author; a new image variant looks up the posts showing its upload
+    __table_args__ = (
+        db.Index('ix_post_created_at_id', 'created_at', 'id'),
+        db.Index('ix_post_author_id_created_at', 'author_id', 'created_at'),
+        db.Index('ix_post_image_url', 'image_url'),
+    )
+
 class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
@@ -106,7 +453,9 @@ class Tag(db.Model):
 # Association table for post-tag many-to-many relationship
 post_tags = db.Table('post_tags',
     db.Column('post_id', db.Integer, db.ForeignKey('post.id'), primary_key=True),
-    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+    # The primary key covers post -> tags; tag-filtered listings need tag -> posts
+    db.Index('ix_post_tags_tag_id_post_id', 'tag_id', 'post_id')
 )
 
 class Comment(db.Model):
@@ -115,12 +464,1681 @@ class Comment(db.Model):
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    excerpt = db.query_expression()
     
     author = db.relationship('User', backref='comments')
 
-# Create tables
-with app.app_context():
-    db.create_all()
+    __table_args__ = (
+        db.Index('ix_comment_post_id_created_at_id', 'post_id', 'created_at', 'id'),
+        db.Index('ix_comment_author_id', 'author_id'),
+        db.Index('ix_comment_created_at_id', 'created_at', 'id'),
+    )
+
+# Content-addressed uploads; ref_count is the number of posts using the file
+# and last_uploaded_at the last time anyone uploaded the same bytes
+class Upload(db.Model):
+    filename = db.Column(db.String(80), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Activity rollups, maintained alongside user/post/comment writes
+class StatCounter(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class ActivityBucket(db.Model):
+    granularity = db.Column(db.String(4), primary_key=True)  # 'hour' or 'day'
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    users = db.Column(db.Integer, nullable=False, default=0)
+    posts = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+
+# Full-text search index (SQLite FTS5), keyed by post id
+SEARCH_TABLE = 'post_search'
+
+def search_available():
+    return db.engine.dialect.name == 'sqlite'
+
+def create_search_index():
+    if not search_available():
+        return
+    db.session.execute(db.text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+        "USING fts5(title, content, tags, tokenize='porter unicode61')"
+    ))
+    db.session.commit()
+
+def index_post(post):
+    """Replace the index row for ``post``; runs in the caller's transaction."""
+    if not search_available():
+        return
+    unindex_post(post.id)
+    index_post_rows([{
+        'id': post.id,
+        'title': post.title,
+        'content': post.content,
+        'tags': ' '.join(tag.name for tag in post.tags)
+    }])
+
+def index_post_rows(rows):
+    """Index new posts given as dicts with id, title, content and tags."""
+    if not search_available() or not rows:
+        return
+    db.session.execute(db.text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, title, content, tags) "
+        "VALUES (:id, :title, :content, :tags)"
+    ), rows)
+
+def unindex_post(post_id):
+    unindex_posts([post_id])
+
+def unindex_posts(post_ids):
+    if not search_available() or not post_ids:
+        return
+    db.session.execute(
+        db.text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN :ids")
+        .bindparams(db.bindparam('ids', expanding=True)),
+        {'ids': list(post_ids)}
+    )
+
+def rebuild_search_index():
+    db.session.execute(db.text(f"DELETE FROM {SEARCH_TABLE}"))
+    result = db.session.execute(db.text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, title, content, tags) "
+        "SELECT post.id, post.title, post.content, "
+        "COALESCE((SELECT group_concat(tag.name, ' ') FROM post_tags "
+        "JOIN tag ON tag.id = post_tags.tag_id WHERE post_tags.post_id = post.id), '') "
+        "FROM post"
+    ))
+    db.session.commit()
+    return result.rowcount
+
+# FTS5 highlight()/snippet() copy the indexed text verbatim, so matches are
+# wrapped in control characters and the result is escaped before they
+# become <mark> tags
+MATCH_OPEN, MATCH_CLOSE = '\x02', '\x03'
+
+def mark_matches(text):
+    if text is None:
+        return None
+    return (html.escape(text).replace(MATCH_OPEN, '<mark>')
+            .replace(MATCH_CLOSE, '</mark>'))
+
+def build_match_query(q):
+    # Quote every term so user input can't inject FTS5 syntax; the last term
+    # is a prefix match to support search-as-you-type.
+    terms = [term.replace('"', '""') for term in q.split()]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuild the full-text search index from the posts table."""
+    create_search_index()
+    print(f'Indexed {rebuild_search_index()} posts')
+
+# Upload reference counting
+# Posts reference uploads through image_url. Reference counts follow post
+# inserts, deletes and image changes in the same flush. Files are only
+# removed by collect_unused_uploads(), once nothing references them and
+# their bytes haven't been uploaded again for UPLOAD_GC_GRACE: an upload
+# deduplicated against a file whose last post is then deleted must survive
+# until the uploader gets to attach it.
+UPLOAD_URL_PREFIX = '/uploads/'
+UPLOAD_GC_GRACE = timedelta(hours=24)
+
+def upload_filename(image_url):
+    if image_url and UPLOAD_URL_PREFIX in image_url:
+        return image_url.rsplit(UPLOAD_URL_PREFIX, 1)[1] or None
+    return None
+
+def digest_uploads(digest):
+    """``(filename, ref_count)`` of each upload of the bytes with ``digest``."""
+    # A range on the primary key: "<digest>" and "<digest>.<ext>" sort below
+    # "<digest>/", and LIKE 'prefix%' can't use the index under SQLite's
+    # case-insensitive LIKE
+    return db.session.execute(
+        db.select(Upload.filename, Upload.ref_count)
+        .where(Upload.filename >= digest, Upload.filename < f'{digest}/')
+    ).all()
+
+def apply_upload_ref_deltas(connection, deltas):
+    """Apply ``{filename: delta}`` to the reference counts."""
+    table = Upload.__table__
+    for filename, delta in deltas.items():
+        if delta:
+            connection.execute(table.update().where(table.c.filename == filename)
+                               .values(ref_count=table.c.ref_count + delta))
+
+@db.event.listens_for(db.session, 'after_flush')
+def update_upload_refs(session, flush_context):
+    deltas = {}
+    
+    def bump(image_url, delta):
+        filename = upload_filename(image_url)
+        if filename:
+            deltas[filename] = deltas.get(filename, 0) + delta
+    
+    for obj in session.new:
+        if isinstance(obj, Post):
+            bump(obj.image_url, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Post):
+            # The stored value, even if image_url was also reassigned
+            history = db.inspect(obj).attrs.image_url.history
+            bump(history.deleted[0] if history.deleted else obj.image_url, -1)
+    for obj in session.dirty:
+        if isinstance(obj, Post):
+            history = db.inspect(obj).attrs.image_url.history
+            if history.has_changes():
+                for url in history.deleted:
+                    bump(url, -1)
+                for url in history.added:
+                    bump(url, 1)
+    
+    if deltas:
+        apply_upload_ref_deltas(session.connection(), deltas)
+
+def _delete_upload_files(filenames):
+    for filename in filenames:
+        upload_store.delete(filename)
+    # Variants are named by digest alone and shared by every extension the
+    # same bytes were uploaded under; keep them while any of those remains
+    for digest in sorted({filename[:64] for filename in filenames if is_hashed_name(filename)}):
+        if not digest_uploads(digest):
+            derivatives.delete_variants(digest)
+
+def collect_unused_uploads(grace=UPLOAD_GC_GRACE):
+    """Delete unreferenced uploads whose bytes weren't uploaded again within ``grace``."""
+    cutoff = datetime.utcnow() - grace
+    table = Upload.__table__
+    # One conditional DELETE, so a post attaching the file or a new upload of
+    # the same bytes in the meantime keeps it
+    filenames = db.session.execute(
+        table.delete().where(table.c.ref_count <= 0, table.c.last_uploaded_at < cutoff)
+        .returning(table.c.filename)
+    ).scalars().all()
+    db.session.commit()
+    _delete_upload_files(filenames)
+    return filenames
+
+# Image derivatives
+def refresh_variant_listings(digest, width, filename):
+    # Runs on a derivative worker thread once a variant is written; cached
+    # post JSON rendered before it existed doesn't list it yet. Variants are
+    # usually made right after the upload, before any post uses it, so the
+    # reference counts mostly settle it without touching the post table.
+    with app.app_context():
+        urls = [f'{UPLOAD_URL_PREFIX}{name}' for name, ref_count in digest_uploads(digest)
+                if ref_count > 0 and is_hashed_name(name)]
+        if not urls:
+            return
+        # Posts store the URL the upload endpoint returned
+        post_ids = db.session.execute(
+            db.select(Post.id).where(Post.image_url.in_(urls))
+        ).scalars().all()
+    if post_ids:
+        response_cache.invalidate('posts', *sorted(f'post:{post_id}' for post_id in post_ids))
+
+derivatives = DerivativeGenerator(
+    app.config['UPLOAD_FOLDER'],
+    widths=app.config['IMAGE_VARIANT_WIDTHS'],
+    image_format=app.config['IMAGE_VARIANT_FORMAT'],
+    workers=app.config['IMAGE_WORKERS'],
+    on_generated=refresh_variant_listings
+)
+
+def image_variants(image_url):
+    """URLs keyed by width for the generated variants of a post image."""
+    filename = upload_filename(image_url)
+    if not filename or not is_hashed_name(filename):
+        return {}
+    return derivatives.variant_urls(filename[:64], UPLOAD_URL_PREFIX)
+
+@app.cli.command('gc-uploads')
+@click.option('--grace-hours', default=24, show_default=True,
+              help='Keep unreferenced uploads uploaded again within this')
+def gc_uploads_command(grace_hours):
+    """Remove uploaded files that no post references."""
+    removed = collect_unused_uploads(timedelta(hours=grace_hours))
+    print(f'Removed {len(removed)} unused uploads')
+
+# Activity rollups
+# Global counters plus hourly/daily buckets are adjusted in the same flush as
+# the rows they count, so the stats endpoints never scan the base tables.
+STAT_COUNTERS = ('users', 'posts', 'comments', 'posts_with_comments')
+ROLLUP_MODELS = {'User': 'users', 'Post': 'posts', 'Comment': 'comments'}
+
+def hour_bucket(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+def day_bucket(ts):
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _upsert_increment(connection, table, keys, deltas):
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**keys, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: table.c[col] + stmt.excluded[col] for col in deltas}
+        )
+        connection.execute(stmt)
+        return
+    
+    condition = db.and_(*[table.c[col] == value for col, value in keys.items()])
+    result = connection.execute(
+        table.update().where(condition).values({col: table.c[col] + delta for col, delta in deltas.items()})
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**keys, **deltas))
+
+def _insert_ignore(connection, table, rows):
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        connection.execute(insert(table).on_conflict_do_nothing(), rows)
+        return
+    
+    from sqlalchemy.exc import IntegrityError
+    for row in rows:
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert(), row)
+        except IntegrityError:
+            pass
+
+def apply_rollup_deltas(connection, counters, buckets):
+    """Apply ``{name: delta}`` counters and ``{(granularity, start): {col: delta}}`` buckets."""
+    for name, delta in counters.items():
+        if delta:
+            _upsert_increment(connection, StatCounter.__table__, {'name': name}, {'value': delta})
+    for (granularity, start), deltas in buckets.items():
+        deltas = {col: delta for col, delta in deltas.items() if delta}
+        if deltas:
+            _upsert_increment(connection, ActivityBucket.__table__,
+                              {'granularity': granularity, 'bucket_start': start}, deltas)
+
+def _add_bucket_delta(buckets, column, created_at, delta):
+    for granularity, start in (('hour', hour_bucket(created_at)), ('day', day_bucket(created_at))):
+        cell = buckets.setdefault((granularity, start), {})
+        cell[column] = cell.get(column, 0) + delta
+
+def counter_update_values(table, values):
+    """Counter writes are bookkeeping; keep them from firing ``onupdate``
+    timestamps such as Post.updated_at."""
+    if 'updated_at' in table.c:
+        values = dict(values, updated_at=table.c.updated_at)
+    return values
+
+@db.event.listens_for(db.session, 'after_flush')
+def update_counters(session, flush_context):
+    """Keep the denormalized post/user counters in step with inserts and deletes."""
+    post_deltas = {}
+    user_deltas = {}
+    
+    def bump(deltas, key, column, delta):
+        cell = deltas.setdefault(key, {})
+        cell[column] = cell.get(column, 0) + delta
+    
+    deleted_posts = {obj.id: obj.author_id for obj in session.deleted if isinstance(obj, Post)}
+    comments = []
+    for objects, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objects:
+            if isinstance(obj, Post):
+                bump(user_deltas, obj.author_id, 'posts_count', sign)
+            elif isinstance(obj, Comment):
+                bump(user_deltas, obj.author_id, 'comments_count', sign)
+                if obj.post_id not in deleted_posts:
+                    bump(post_deltas, obj.post_id, 'comments_count', sign)
+                comments.append((obj.post_id, sign))
+    
+    if not post_deltas and not user_deltas:
+        return
+    
+    connection = session.connection()
+    post_authors = dict(deleted_posts)
+    missing = {post_id for post_id, _ in comments} - set(post_authors)
+    if missing:
+        post_authors.update(connection.execute(
+            db.select(Post.id, Post.author_id).where(Post.id.in_(missing))
+        ).all())
+    for post_id, sign in comments:
+        if post_id in post_authors:
+            bump(user_deltas, post_authors[post_id], 'comments_received', sign)
+    
+    apply_counter_deltas(connection, Post, post_deltas)
+    apply_counter_deltas(connection, User, user_deltas)
+
+def apply_counter_deltas(connection, model, deltas):
+    """Apply ``{row_id: {column: delta}}`` as relative UPDATEs, one
+    executemany per set of columns touched."""
+    table = model.__table__
+    groups = {}
+    for row_id, cell in deltas.items():
+        cell = {col: delta for col, delta in cell.items() if delta}
+        if cell:
+            params = {f'delta_{col}': delta for col, delta in cell.items()}
+            groups.setdefault(tuple(sorted(cell)), []).append(dict(params, row_id=row_id))
+    for columns, rows in groups.items():
+        values = {col: table.c[col] + db.bindparam(f'delta_{col}') for col in columns}
+        connection.execute(table.update().where(table.c.id == db.bindparam('row_id'))
+                           .values(counter_update_values(table, values)), rows)
+
+@db.event.listens_for(db.session, 'after_flush')
+def update_rollups(session, flush_context):
+    counters = {}
+    buckets = {}
+    for objects, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objects:
+            column = ROLLUP_MODELS.get(type(obj).__name__)
+            if column is None:
+                continue
+            counters[column] = counters.get(column, 0) + sign
+            if obj.created_at is not None:
+                _add_bucket_delta(buckets, column, obj.created_at, sign)
+    
+    if not counters:
+        return
+    
+    connection = session.connection()
+    counters['posts_with_comments'] = _engagement_delta(session, connection)
+    apply_rollup_deltas(connection, counters, buckets)
+
+def _engagement_delta(session, connection):
+    # Track how many posts have at least one comment: a post flips when its
+    # first comment arrives or its last one goes away.
+    deleted_posts = {obj.id for obj in session.deleted if isinstance(obj, Post)}
+    added = {}
+    removed = {}
+    for obj in session.new:
+        if isinstance(obj, Comment):
+            added[obj.post_id] = added.get(obj.post_id, 0) + 1
+    for obj in session.deleted:
+        if isinstance(obj, Comment):
+            removed[obj.post_id] = removed.get(obj.post_id, 0) + 1
+    
+    delta = -len(deleted_posts & set(removed))
+    touched = (set(added) | set(removed)) - deleted_posts
+    if not touched:
+        return delta
+    
+    remaining = dict(connection.execute(
+        db.select(Comment.post_id, db.func.count(Comment.id))
+        .where(Comment.post_id.in_(touched))
+        .group_by(Comment.post_id)
+    ).all())
+    for post_id in touched:
+        after = remaining.get(post_id, 0)
+        before = after - added.get(post_id, 0) + removed.get(post_id, 0)
+        if before == 0 and after > 0:
+            delta += 1
+        elif before > 0 and after == 0:
+            delta -= 1
+    return delta
+
+def _bucket_expression(column, granularity):
+    if db.engine.dialect.name == 'sqlite':
+        fmt = '%Y-%m-%d %H:00:00' if granularity == 'hour' else '%Y-%m-%d 00:00:00'
+        return db.func.strftime(fmt, column)
+    return db.func.date_trunc(granularity, column)
+
+def rebuild_rollups():
+    """Recompute every counter and bucket from the base tables."""
+    db.session.query(StatCounter).delete()
+    db.session.query(ActivityBucket).delete()
+    
+    counters = {
+        'users': User.query.count(),
+        'posts': Post.query.count(),
+        'comments': Comment.query.count(),
+        'posts_with_comments': db.session.query(db.func.count(db.distinct(Comment.post_id))).scalar()
+    }
+    buckets = {}
+    for model, column in ((User, 'users'), (Post, 'posts'), (Comment, 'comments')):
+        for granularity in ('hour', 'day'):
+            start = _bucket_expression(model.created_at, granularity)
+            rows = db.session.query(start, db.func.count(model.id)) \
+                .filter(model.created_at.isnot(None)).group_by(start).all()
+            for bucket_start, count in rows:
+                if isinstance(bucket_start, str):
+                    bucket_start = datetime.fromisoformat(bucket_start)
+                cell = buckets.setdefault((granularity, bucket_start), {})
+                cell[column] = count
+    
+    db.session.add_all(StatCounter(name=name, value=counters[name]) for name in STAT_COUNTERS)
+    db.session.add_all(
+        ActivityBucket(granularity=granularity, bucket_start=start, **cells)
+        for (granularity, start), cells in buckets.items()
+    )
+    db.session.commit()
+    return counters
+
+def activity_in_window(window, now=None):
+    """Sum user/post/comment activity over the trailing ``window``.
+
+    Whole days come from daily buckets and the partial days at either end from
+    hourly buckets, so the result is accurate to the hour.
+    """
+    now = now or datetime.utcnow()
+    start = hour_bucket(now - window)
+    first_day = day_bucket(start)
+    if first_day < start:
+        first_day += timedelta(days=1)
+    last_day = day_bucket(now)
+    
+    columns = (db.func.coalesce(db.func.sum(ActivityBucket.users), 0),
+               db.func.coalesce(db.func.sum(ActivityBucket.posts), 0),
+               db.func.coalesce(db.func.sum(ActivityBucket.comments), 0))
+    totals = [0, 0, 0]
+    if first_day < last_day:
+        daily = db.session.query(*columns).filter(
+            ActivityBucket.granularity == 'day',
+            ActivityBucket.bucket_start >= first_day,
+            ActivityBucket.bucket_start < last_day
+        ).one()
+        hourly = db.session.query(*columns).filter(
+            ActivityBucket.granularity == 'hour',
+            db.or_(
+                db.and_(ActivityBucket.bucket_start >= start, ActivityBucket.bucket_start < first_day),
+                ActivityBucket.bucket_start >= last_day
+            )
+        ).one()
+        parts = (daily, hourly)
+    else:
+        parts = (db.session.query(*columns).filter(
+            ActivityBucket.granularity == 'hour',
+            ActivityBucket.bucket_start >= start
+        ).one(),)
+    for part in parts:
+        totals = [total + value for total, value in zip(totals, part)]
+    return dict(zip(('users', 'posts', 'comments'), totals))
+
+STAT_WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30)
+}
+
+def read_stats(window='7d'):
+    counters = dict(db.session.query(StatCounter.name, StatCounter.value).all())
+    recent = activity_in_window(STAT_WINDOWS[window])
+    total_posts = counters.get('posts', 0)
+    posts_with_comments = counters.get('posts_with_comments', 0)
+    engagement_rate = (posts_with_comments / total_posts * 100) if total_posts > 0 else 0
+    return {
+        'total_users': counters.get('users', 0),
+        'total_posts': total_posts,
+        'total_comments': counters.get('comments', 0),
+        'recent_users': recent['users'],
+        'recent_posts': recent['posts'],
+        'recent_comments': recent['comments'],
+        'engagement_rate': round(engagement_rate, 1),
+        'pending_comments': 0,  # All comments are approved for now
+        'window': window
+    }
+
+# Counter backfill and verification
+def _expected_counters():
+    comments_on_post = db.select(db.func.count(Comment.id)) \
+        .where(Comment.post_id == Post.id).scalar_subquery()
+    posts_by_user = db.select(db.func.count(Post.id)) \
+        .where(Post.author_id == User.id).scalar_subquery()
+    comments_by_user = db.select(db.func.count(Comment.id)) \
+        .where(Comment.author_id == User.id).scalar_subquery()
+    received_by_user = db.select(db.func.count(Comment.id)) \
+        .join(Post, Comment.post_id == Post.id) \
+        .where(Post.author_id == User.id).scalar_subquery()
+    return (
+        (Post, {'comments_count': comments_on_post}),
+        (User, {
+            'posts_count': posts_by_user,
+            'comments_count': comments_by_user,
+            'comments_received': received_by_user
+        })
+    )
+
+def backfill_counters():
+    for model, columns in _expected_counters():
+        db.session.execute(model.__table__.update().values(counter_update_values(model.__table__, columns)))
+    db.session.commit()
+
+def verify_counters(limit=20):
+    """Return up to ``limit`` (table, id, column, stored, expected) mismatches."""
+    mismatches = []
+    for model, columns in _expected_counters():
+        for column, expected in columns.items():
+            stored = getattr(model, column)
+            rows = db.session.query(model.id, stored, expected) \
+                .filter(stored != expected).limit(limit).all()
+            mismatches.extend((model.__tablename__, row[0], column, row[1], row[2]) for row in rows)
+    return mismatches[:limit]
+
+@app.cli.command('backfill-counters')
+def backfill_counters_command():
+    """Recompute the denormalized post/user counters from the base tables."""
+    backfill_counters()
+    print('Counters backfilled')
+
+@app.cli.command('verify-counters')
+def verify_counters_command():
+    """Report denormalized counters that disagree with the base tables."""
+    mismatches = verify_counters()
+    for table, row_id, column, stored, expected in mismatches:
+        print(f'{table}#{row_id} {column}: stored={stored} expected={expected}')
+    if mismatches:
+        raise SystemExit(1)
+    print('All counters match')
+
+@app.cli.command('reconcile-rollups')
+def reconcile_rollups_command():
+    """Rebuild activity counters and buckets from the base tables."""
+    counters = rebuild_rollups()
+    print(', '.join(f'{name}={value}' for name, value in counters.items()))
+
+# Tag resolution
+def _unique_tag_names(names):
+    return list(dict.fromkeys(name for name in names if name))
+
+def resolve_tag_ids(names):
+    """Map tag names to ids with one IN query, inserting missing names.
+
+    Missing tags are inserted with INSERT ... ON CONFLICT DO NOTHING, so a
+    concurrent writer creating the same tag can't trip the unique constraint.
+    """
+    names = _unique_tag_names(names)
+    if not names:
+        return {}
+    ids = dict(db.session.execute(
+        db.select(Tag.name, Tag.id).where(Tag.name.in_(names))
+    ).all())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        _insert_ignore(db.session.connection(), Tag.__table__, [{'name': name} for name in missing])
+        ids.update(db.session.execute(
+            db.select(Tag.name, Tag.id).where(Tag.name.in_(missing))
+        ).all())
+    return ids
+
+def resolve_tags(names):
+    """Return Tag objects for ``names`` in order, creating missing ones."""
+    names = _unique_tag_names(names)
+    ids = resolve_tag_ids(names)
+    if not ids:
+        return []
+    tags = {tag.id: tag for tag in Tag.query.filter(Tag.id.in_(ids.values()))}
+    return [tags[ids[name]] for name in names]
+
+# Tag index
+# Post counts, prefix search and trending for /api/tags are served from
+# memory. Post tag changes are collected before each flush and applied
+# once the transaction commits; writers that bypass the ORM add theirs with
+# record_tag_changes(). Usages from the last TAG_TRENDING_WINDOW half-lives
+# seed the trending scores on load; older ones have decayed to noise.
+TAG_TRENDING_WINDOW = 10
+TAG_LIMIT_MAX = 100
+
+tag_index = TagIndex(half_life=app.config['TAG_TRENDING_HALF_LIFE_HOURS'] * 3600)
+
+def _epoch(timestamp):
+    return timestamp.replace(tzinfo=timezone.utc).timestamp()
+
+def load_tag_index():
+    counts = db.session.execute(
+        db.select(Tag.id, Tag.name, db.func.count(post_tags.c.post_id))
+        .outerjoin(post_tags, post_tags.c.tag_id == Tag.id)
+        .group_by(Tag.id, Tag.name)
+    ).all()
+    since = datetime.utcnow() - timedelta(seconds=tag_index.half_life * TAG_TRENDING_WINDOW)
+    usages = db.session.execute(
+        db.select(Tag.name, Post.created_at)
+        .join(post_tags, post_tags.c.tag_id == Tag.id)
+        .join(Post, Post.id == post_tags.c.post_id)
+        .where(Post.created_at >= since)
+    ).all()
+    tag_index.load(counts, ((name, _epoch(created_at)) for name, created_at in usages))
+
+def current_tag_index():
+    """Return the tag index, (re)loading it when missing or past its reload interval."""
+    reload_after = app.config['TAG_INDEX_RELOAD_SECONDS']
+    loaded_at = tag_index.loaded_at
+    if loaded_at is None or (reload_after and time.time() - loaded_at > reload_after):
+        load_tag_index()
+    return tag_index
+
+def verify_tag_index(limit=20):
+    """Return up to ``limit`` (name, indexed, actual) post count mismatches."""
+    actual = {name: count for _, name, count in db.session.execute(
+        db.select(Tag.id, Tag.name, db.func.count(post_tags.c.post_id))
+        .outerjoin(post_tags, post_tags.c.tag_id == Tag.id)
+        .group_by(Tag.id, Tag.name)
+    )}
+    indexed = tag_index.counts()
+    mismatches = [(name, indexed.get(name), actual.get(name))
+                  for name in sorted(set(actual) | set(indexed))
+                  if indexed.get(name) != actual.get(name)]
+    return mismatches[:limit]
+
+def record_tag_changes(session, changes):
+    """Queue ``(tag_id, name, delta, created_at)`` changes for the index."""
+    session.info.setdefault('tag_changes', []).extend(
+        (tag_id, name, delta, _epoch(created_at)) for tag_id, name, delta, created_at in changes
+    )
+
+@db.event.listens_for(db.session, 'before_flush')
+def track_tag_changes(session, flush_context, instances):
+    # A usage is timed at its post's creation, as load_tag_index() reads it
+    # back: removals undo exactly the weight added, and reloads agree
+    now = datetime.utcnow()
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Post):
+            changes.extend((tag.id, tag.name, 1, obj.created_at or now) for tag in obj.tags)
+    for obj in session.deleted:
+        if isinstance(obj, Post):
+            changes.extend((tag.id, tag.name, -1, obj.created_at or now) for tag in obj.tags)
+    for obj in session.dirty:
+        if isinstance(obj, Post):
+            history = db.inspect(obj).attrs.tags.history
+            changes.extend((tag.id, tag.name, 1, obj.created_at or now) for tag in history.added)
+            changes.extend((tag.id, tag.name, -1, obj.created_at or now) for tag in history.deleted)
+    if changes:
+        record_tag_changes(session, changes)
+
+@db.event.listens_for(db.session, 'after_commit')
+def apply_tag_changes(session):
+    changes = session.info.pop('tag_changes', None)
+    if changes and tag_index.loaded_at is not None:
+        tag_index.apply(changes)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def discard_tag_changes(session):
+    session.info.pop('tag_changes', None)
+
+# Bulk import
+# Posts arrive as NDJSON, one object per line:
+#   {"title": ..., "content": ..., "author": "<username>", "tags": [...],
+#    "image_url": ..., "created_at": "<iso8601>",
+#    "comments": [{"author": "<username>", "content": ..., "created_at": ...}]}
+# Each batch is a single transaction of executemany INSERTs; counters, rollups
+# and the search index are adjusted from the batch's aggregated deltas.
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ERRORS = 100
+
+def _parse_timestamp(value):
+    if not value:
+        return datetime.utcnow()
+    ts = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+def _parse_import_record(line):
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError('expected a JSON object')
+    for field in ('title', 'content', 'author'):
+        if not record.get(field):
+            raise ValueError(f'missing {field}')
+    record['created_at'] = _parse_timestamp(record.get('created_at'))
+    record['tags'] = _unique_tag_names(record.get('tags') or [])
+    comments = record.get('comments') or []
+    for comment in comments:
+        if not isinstance(comment, dict) or not comment.get('content') or not comment.get('author'):
+            raise ValueError('comments need author and content')
+        comment['created_at'] = _parse_timestamp(comment.get('created_at'))
+    record['comments'] = comments
+    return record
+
+def _import_batch(batch, summary):
+    usernames = set()
+    for _, record in batch:
+        usernames.add(record['author'])
+        usernames.update(comment['author'] for comment in record['comments'])
+    user_ids = dict(db.session.execute(
+        db.select(User.username, User.id).where(User.username.in_(usernames))
+    ).all())
+    
+    records = []
+    for line_no, record in batch:
+        authors = {record['author']} | {comment['author'] for comment in record['comments']}
+        unknown = sorted(authors - set(user_ids))
+        if unknown:
+            summary['errors'].append({'line': line_no, 'error': f"unknown authors: {', '.join(unknown)}"})
+        else:
+            records.append(record)
+    if not records:
+        return
+    
+    tag_ids = resolve_tag_ids(name for record in records for name in record['tags'])
+    post_table = Post.__table__
+    post_ids = db.session.execute(
+        post_table.insert().returning(post_table.c.id, sort_by_parameter_order=True),
+        [{
+            'title': record['title'],
+            'content': record['content'],
+            'image_url': record.get('image_url'),
+            'author_id': user_ids[record['author']],
+            'created_at': record['created_at'],
+            'updated_at': record['created_at'],
+            'comments_count': len(record['comments'])
+        } for record in records]
+    ).scalars().all()
+    
+    tag_rows = []
+    comment_rows = []
+    search_rows = []
+    user_deltas = {}
+    counters = {'posts': len(records), 'comments': 0, 'posts_with_comments': 0}
+    buckets = {}
+    
+    def bump(user_id, column, delta):
+        cell = user_deltas.setdefault(user_id, {})
+        cell[column] = cell.get(column, 0) + delta
+    
+    for post_id, record in zip(post_ids, records):
+        author_id = user_ids[record['author']]
+        tag_rows.extend({'post_id': post_id, 'tag_id': tag_ids[name]} for name in record['tags'])
+        record_tag_changes(db.session, [(tag_ids[name], name, 1, record['created_at'])
+                                        for name in record['tags']])
+        search_rows.append({
+            'id': post_id,
+            'title': record['title'],
+            'content': record['content'],
+            'tags': ' '.join(record['tags'])
+        })
+        bump(author_id, 'posts_count', 1)
+        _add_bucket_delta(buckets, 'posts', record['created_at'], 1)
+        for comment in record['comments']:
+            comment_rows.append({
+                'content': comment['content'],
+                'author_id': user_ids[comment['author']],
+                'post_id': post_id,
+                'created_at': comment['created_at']
+            })
+            bump(user_ids[comment['author']], 'comments_count', 1)
+            _add_bucket_delta(buckets, 'comments', comment['created_at'], 1)
+        if record['comments']:
+            bump(author_id, 'comments_received', len(record['comments']))
+            counters['comments'] += len(record['comments'])
+            counters['posts_with_comments'] += 1
+    
+    if tag_rows:
+        db.session.execute(post_tags.insert(), tag_rows)
+    if comment_rows:
+        db.session.execute(Comment.__table__.insert(), comment_rows)
+    index_post_rows(search_rows)
+    connection = db.session.connection()
+    apply_counter_deltas(connection, User, user_deltas)
+    apply_rollup_deltas(connection, counters, buckets)
+    upload_deltas = {}
+    for record in records:
+        filename = upload_filename(record.get('image_url'))
+        if filename:
+            upload_deltas[filename] = upload_deltas.get(filename, 0) + 1
+    apply_upload_ref_deltas(connection, upload_deltas)
+    
+    summary['posts'] += len(records)
+    summary['comments'] += len(comment_rows)
+
+def import_posts(lines, batch_size=IMPORT_BATCH_SIZE):
+    """Import NDJSON post records; returns counts and per-line errors."""
+    from sqlalchemy.exc import SQLAlchemyError
+    summary = {'posts': 0, 'comments': 0, 'errors': []}
+    
+    def flush(batch):
+        try:
+            _import_batch(batch, summary)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            summary['errors'].append({
+                'line': batch[0][0],
+                'error': f'batch of {len(batch)} records failed: {e.__class__.__name__}'
+            })
+    
+    batch = []
+    for line_no, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            batch.append((line_no, _parse_import_record(line)))
+        except ValueError as e:
+            summary['errors'].append({'line': line_no, 'error': str(e)})
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    
+    if summary['posts']:
+        response_cache.invalidate('posts')
+        invalidate_rss_cache()
+    return summary
+
+@app.cli.command('import-posts')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True)
+def import_posts_command(path, batch_size):
+    """Bulk import posts (with tags and comments) from an NDJSON file."""
+    with open(path, encoding='utf-8') as f:
+        summary = import_posts(f, batch_size)
+    for error in summary['errors'][:IMPORT_MAX_ERRORS]:
+        print(f"line {error['line']}: {error['error']}")
+    print(f"Imported {summary['posts']} posts and {summary['comments']} comments "
+          f"({len(summary['errors'])} errors)")
+
+# Bulk moderation
+# Admins delete posts or comments matching a filter (ids, author, date range,
+# content match) with set-based DELETE ... RETURNING statements, one
+# transaction per batch of ids. Rows never enter the ORM session; counters,
+# rollups, the tag and search indexes and upload references are adjusted
+# from the deleted rows, as the import does for inserted ones.
+
+# Each batch binds its ids as parameters, well under SQLite's 32766 limit
+MODERATION_BATCH_SIZE = 2000
+MODERATION_FILTERS = ('ids', 'author', 'since', 'until', 'contains')
+
+class InvalidModerationFilter(ValueError):
+    pass
+
+def moderation_filter(model, filters):
+    """Return ``(condition, ids)`` selecting the ``model`` rows that match
+    every filter. ``ids`` is kept out of the condition (None when not given)
+    so it can be applied a batch at a time."""
+    unknown = sorted(set(filters) - set(MODERATION_FILTERS))
+    if unknown:
+        raise InvalidModerationFilter(f"unknown filters: {', '.join(unknown)}")
+    if all(filters.get(name) in (None, '') for name in MODERATION_FILTERS):
+        raise InvalidModerationFilter(f"give at least one of: {', '.join(MODERATION_FILTERS)}")
+    
+    clauses = []
+    ids = filters.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not all(type(row_id) is int for row_id in ids):
+            raise InvalidModerationFilter('ids must be a list of integers')
+        ids = sorted(set(ids))
+    if filters.get('author'):
+        author_id = db.session.execute(
+            db.select(User.id).where(User.username == filters['author'])
+        ).scalar()
+        if author_id is None:
+            raise InvalidModerationFilter(f"unknown author: {filters['author']}")
+        clauses.append(model.author_id == author_id)
+    for name, compare in (('since', model.created_at.__ge__), ('until', model.created_at.__lt__)):
+        if filters.get(name):
+            try:
+                clauses.append(compare(_parse_timestamp(str(filters[name]))))
+            except ValueError:
+                raise InvalidModerationFilter(f'{name} must be an ISO 8601 timestamp')
+    if filters.get('contains'):
+        text = str(filters['contains'])
+        match = model.content.icontains(text, autoescape=True)
+        if model is Post:
+            match = db.or_(Post.title.icontains(text, autoescape=True), match)
+        clauses.append(match)
+    return (db.and_(*clauses) if clauses else db.true()), ids
+
+def _moderation_batches(model, condition, ids, batch_size):
+    """Yield the ids of matching rows, at most ``batch_size`` at a time."""
+    if ids is not None:
+        for start in range(0, len(ids), batch_size):
+            batch = db.session.execute(
+                db.select(model.id).where(condition, model.id.in_(ids[start:start + batch_size]))
+                .order_by(model.id)
+            ).scalars().all()
+            if batch:
+                yield batch
+        return
+    
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            db.select(model.id).where(condition, model.id > last_id)
+            .order_by(model.id).limit(batch_size)
+        ).scalars().all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+def _add_counter_delta(deltas, row_id, column, delta):
+    cell = deltas.setdefault(row_id, {})
+    cell[column] = cell.get(column, 0) + delta
+
+def _comment_removal_deltas(connection, comments, deleted_posts=None):
+    """Counter and rollup deltas for deleted ``(author_id, post_id, hour)``
+    comment rows, where ``hour`` is the creation hour from
+    _bucket_expression. ``deleted_posts`` maps the ids of posts deleted along
+    with them to their authors."""
+    deleted_posts = deleted_posts or {}
+    post_deltas = {}
+    user_deltas = {}
+    buckets = {}
+    # Spam waves repeat authors, posts and hours, so count before bucketing
+    per_author = Counter(author_id for author_id, _, _ in comments)
+    per_post = Counter(post_id for _, post_id, _ in comments)
+    for author_id, count in per_author.items():
+        _add_counter_delta(user_deltas, author_id, 'comments_count', -count)
+    for hour, count in Counter(hour for _, _, hour in comments).items():
+        if hour is not None:
+            if isinstance(hour, str):
+                hour = datetime.fromisoformat(hour)
+            _add_bucket_delta(buckets, 'comments', hour, -count)
+    
+    post_authors = dict(deleted_posts)
+    missing = set(per_post) - set(post_authors)
+    if missing:
+        post_authors.update(connection.execute(
+            db.select(Post.id, Post.author_id).where(Post.id.in_(missing))
+        ).all())
+    for post_id, count in per_post.items():
+        if post_id in post_authors:
+            _add_counter_delta(user_deltas, post_authors[post_id], 'comments_received', -count)
+        if post_id not in deleted_posts:
+            _add_counter_delta(post_deltas, post_id, 'comments_count', -count)
+    
+    # Posts whose last comment went away no longer count as engaged
+    emptied = len(set(per_post) & set(deleted_posts))
+    surviving = set(per_post) - set(deleted_posts)
+    if surviving:
+        still_commented = connection.execute(
+            db.select(db.func.count(db.distinct(Comment.post_id))).where(Comment.post_id.in_(surviving))
+        ).scalar()
+        emptied += len(surviving) - still_commented
+    counters = {'comments': -len(comments), 'posts_with_comments': -emptied}
+    return post_deltas, user_deltas, counters, buckets
+
+def delete_comment_batch(comment_ids):
+    """Delete comments by id in the current transaction; returns the ids of
+    their posts and the number deleted."""
+    connection = db.session.connection()
+    table = Comment.__table__
+    comments = connection.execute(
+        table.delete().where(table.c.id.in_(comment_ids))
+        .returning(table.c.author_id, table.c.post_id, _bucket_expression(table.c.created_at, 'hour'))
+    ).all()
+    post_deltas, user_deltas, counters, buckets = _comment_removal_deltas(connection, comments)
+    apply_counter_deltas(connection, Post, post_deltas)
+    apply_counter_deltas(connection, User, user_deltas)
+    apply_rollup_deltas(connection, counters, buckets)
+    return {post_id for _, post_id, _ in comments}, len(comments)
+
+def delete_post_batch(post_ids):
+    """Delete posts by id, with their comments and tag links, in the current
+    transaction; returns the deleted post ids and the number of comments."""
+    connection = db.session.connection()
+    post_table = Post.__table__
+    comment_table = Comment.__table__
+    comments = connection.execute(
+        comment_table.delete().where(comment_table.c.post_id.in_(post_ids))
+        .returning(comment_table.c.author_id, comment_table.c.post_id,
+                   _bucket_expression(comment_table.c.created_at, 'hour'))
+    ).all()
+    tags = connection.execute(
+        db.select(post_tags.c.post_id, Tag.id, Tag.name)
+        .join(Tag, Tag.id == post_tags.c.tag_id)
+        .where(post_tags.c.post_id.in_(post_ids))
+    ).all()
+    connection.execute(post_tags.delete().where(post_tags.c.post_id.in_(post_ids)))
+    posts = connection.execute(
+        post_table.delete().where(post_table.c.id.in_(post_ids))
+        .returning(post_table.c.id, post_table.c.author_id, post_table.c.created_at, post_table.c.image_url)
+    ).all()
+    unindex_posts(post_ids)
+    
+    post_authors = {post_id: author_id for post_id, author_id, _, _ in posts}
+    _, user_deltas, counters, buckets = _comment_removal_deltas(connection, comments, post_authors)
+    counters['posts'] = -len(posts)
+    upload_deltas = {}
+    created = {}
+    now = datetime.utcnow()
+    for post_id, author_id, created_at, image_url in posts:
+        created[post_id] = created_at or now
+        _add_counter_delta(user_deltas, author_id, 'posts_count', -1)
+        if created_at is not None:
+            _add_bucket_delta(buckets, 'posts', created_at, -1)
+        filename = upload_filename(image_url)
+        if filename:
+            upload_deltas[filename] = upload_deltas.get(filename, 0) - 1
+    
+    apply_counter_deltas(connection, User, user_deltas)
+    apply_rollup_deltas(connection, counters, buckets)
+    apply_upload_ref_deltas(connection, upload_deltas)
+    record_tag_changes(db.session, [(tag_id, name, -1, created[post_id])
+                                    for post_id, tag_id, name in tags if post_id in created])
+    if posts:
+        db.session.info['feed_changed'] = True
+    return set(post_authors), len(comments)
+
+def _count_matches(model, batch):
+    """(posts, comments) a batch would delete, for dry runs."""
+    if model is Comment:
+        return 0, len(batch)
+    return len(batch), db.session.execute(
+        db.select(db.func.count(Comment.id)).where(Comment.post_id.in_(batch))
+    ).scalar()
+
+def bulk_delete(model, filters, batch_size=MODERATION_BATCH_SIZE, dry_run=False):
+    """Delete the posts or comments matching ``filters``; returns affected-row counts.
+
+    Each batch commits on its own, so a failure stops the run with the
+    earlier batches already applied and reported.
+    """
+    from sqlalchemy.exc import SQLAlchemyError
+    condition, ids = moderation_filter(model, filters)
+    summary = {'posts': 0, 'comments': 0, 'batches': 0, 'dry_run': dry_run}
+    touched = set()
+    started = time.perf_counter()
+    try:
+        for batch in _moderation_batches(model, condition, ids, batch_size):
+            if dry_run:
+                posts, comments = _count_matches(model, batch)
+            else:
+                delete_batch = delete_post_batch if model is Post else delete_comment_batch
+                post_ids, comments = delete_batch(batch)
+                db.session.commit()
+                touched |= post_ids
+                posts = len(post_ids) if model is Post else 0
+            summary['posts'] += posts
+            summary['comments'] += comments
+            summary['batches'] += 1
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        summary['error'] = f"batch {summary['batches'] + 1} failed: {e.__class__.__name__}"
+    if dry_run:
+        db.session.rollback()
+    
+    if touched:
+        response_cache.invalidate('posts', *sorted(f'post:{post_id}' for post_id in touched))
+    summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return summary
+
+@app.cli.command('bulk-delete')
+@click.argument('kind', type=click.Choice(['posts', 'comments']))
+@click.option('--id', 'ids', type=int, multiple=True, help='Row id; repeat for several')
+@click.option('--author', help='Author username')
+@click.option('--since', help='Created at or after this ISO 8601 time')
+@click.option('--until', help='Created before this ISO 8601 time')
+@click.option('--contains', help='Case-insensitive text match on the content (and post titles)')
+@click.option('--batch-size', default=MODERATION_BATCH_SIZE, show_default=True)
+@click.option('--dry-run', is_flag=True, help='Only count what would be deleted')
+def bulk_delete_command(kind, ids, author, since, until, contains, batch_size, dry_run):
+    """Delete posts or comments matching every given filter."""
+    filters = {'author': author, 'since': since, 'until': until, 'contains': contains}
+    if ids:
+        filters['ids'] = list(ids)
+    try:
+        summary = bulk_delete(Post if kind == 'posts' else Comment, filters, batch_size, dry_run)
+    except InvalidModerationFilter as e:
+        raise click.UsageError(str(e))
+    verb = 'Would delete' if dry_run else 'Deleted'
+    print(f"{verb} {summary['posts']} posts and {summary['comments']} comments "
+          f"in {summary['batches']} batches ({summary['elapsed_ms']} ms)")
+    if 'error' in summary:
+        raise click.ClickException(summary['error'])
+
+# Schema migrations
+# The schema is versioned under migrations/. Databases created before that
+# (by db.create_all) are stamped at the baseline, the five tables the app
+# started with. Builds between then and migrations may have created some of
+# the later tables and columns already, so each later revision checks the
+# schema before adding to it and rebuilds its derived data either way.
+BASELINE_REVISION = '0001_baseline'
+
+def upgrade_database():
+    inspector = db.inspect(db.engine)
+    if inspector.has_table('user') and not inspector.has_table('alembic_version'):
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
+def prepare_database():
+    """Bring the schema up to date and seed the rollups of a new database."""
+    upgrade_database()
+    if not db.session.query(StatCounter.name).first():
+        rebuild_rollups()
+
+# Serialization helpers
+# Listing endpoints eager-load authors and tags and read the denormalized
+# counters, so they issue a fixed number of SELECTs per page.
+def post_listing_query():
+    return Post.query.options(
+        db.joinedload(Post.author),
+        db.selectinload(Post.tags)
+    )
+
+# Field projection
+# Listings accept ?fields=a,b,c to choose the keys they return and ?excerpt=N
+# to cut the body down to N characters. Only the columns behind the requested
+# keys are loaded, and excerpts are cut in SQL, so a preview never pulls the
+# full body out of the database.
+POST_FIELDS = ('id', 'title', 'content', 'excerpt', 'image_url', 'image_variants', 'author',
+               'tags', 'comments_count', 'created_at')
+POST_SUMMARY_FIELDS = tuple(field for field in POST_FIELDS if field != 'excerpt')
+POST_DETAIL_FIELDS = POST_SUMMARY_FIELDS + ('comments',)
+ADMIN_POST_FIELDS = ('id', 'title', 'content', 'author', 'created_at', 'comments_count', 'tags',
+                     'image_url')
+ADMIN_COMMENT_FIELDS = ('id', 'content', 'author', 'post_title', 'created_at')
+# Post columns each field needs; id and created_at are always loaded
+POST_FIELD_COLUMNS = {
+    'title': 'title',
+    'content': 'content',
+    'image_url': 'image_url',
+    'image_variants': 'image_url',
+    'author': 'author_id',
+    'comments_count': 'comments_count'
+}
+DEFAULT_EXCERPT_LENGTH = 200
+MAX_EXCERPT_LENGTH = 5000
+
+class InvalidProjection(ValueError):
+    pass
+
+Projection = namedtuple('Projection', ['fields', 'excerpt'])
+
+def requested_projection(allowed, default, excerpt=None, args=None):
+    """Parse ?fields= and ?excerpt= into a Projection.
+
+    ``default`` is used when ?fields= is absent and ``excerpt`` when
+    ?excerpt= is absent (None keeps the full body). ``args`` defaults to the
+    current request's query arguments.
+    """
+    args = request.args if args is None else args
+    raw = args.get('fields')
+    if raw is None:
+        fields = tuple(default)
+    else:
+        fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in fields if name not in allowed]
+        if unknown:
+            raise InvalidProjection(f"Unknown fields: {', '.join(unknown)}")
+        if not fields:
+            raise InvalidProjection('fields must name at least one field')
+    
+    if 'excerpt' in args:
+        excerpt = args.get('excerpt', type=int)
+        if excerpt is None or not 0 < excerpt <= MAX_EXCERPT_LENGTH:
+            raise InvalidProjection(f'excerpt must be between 1 and {MAX_EXCERPT_LENGTH}')
+    return Projection(fields, excerpt)
+
+def requested_post_projection(allowed=POST_FIELDS, default=POST_SUMMARY_FIELDS, args=None):
+    """Like requested_projection; ?excerpt=N returns 'excerpt' in place of
+    'content', and asking for 'excerpt' alone uses the default length."""
+    projection = requested_projection(allowed, default, args=args)
+    fields = projection.fields
+    if projection.excerpt is not None:
+        fields = tuple(dict.fromkeys('excerpt' if name == 'content' else name for name in fields))
+    if 'excerpt' not in fields:
+        return Projection(fields, None)
+    return Projection(fields, projection.excerpt or DEFAULT_EXCERPT_LENGTH)
+
+def excerpt_expression(column, length):
+    # One character more than asked for tells truncate_excerpt whether the
+    # body was longer
+    return db.func.substr(column, 1, length + 1)
+
+def truncate_excerpt(text, length):
+    if text is None or len(text) <= length:
+        return text
+    return text[:length] + '...'
+
+def post_projection_options(fields, excerpt=None):
+    """Loader options that load only what ``fields`` need; 'excerpt' selects
+    the first ``excerpt`` characters of the body instead of the body itself."""
+    columns = {Post.id, Post.created_at}
+    columns.update(getattr(Post, POST_FIELD_COLUMNS[name]) for name in fields if name in POST_FIELD_COLUMNS)
+    options = [db.load_only(*columns)]
+    if 'author' in fields:
+        options.append(db.joinedload(Post.author).load_only(User.id, User.username))
+    if 'tags' in fields:
+        options.append(db.selectinload(Post.tags))
+    if 'excerpt' in fields:
+        options.append(db.with_expression(Post.excerpt, excerpt_expression(Post.content, excerpt)))
+    return options
+
+def project_post_query(query, fields, excerpt=None):
+    return query.options(*post_projection_options(fields, excerpt))
+
+def project_comment_query(query, fields, excerpt=None):
+    columns = {Comment.id, Comment.created_at}
+    options = []
+    if 'content' in fields:
+        if excerpt is None:
+            columns.add(Comment.content)
+        else:
+            options.append(db.with_expression(Comment.excerpt, excerpt_expression(Comment.content, excerpt)))
+    if 'author' in fields:
+        columns.add(Comment.author_id)
+        options.append(db.joinedload(Comment.author).load_only(User.id, User.username))
+    if 'post_title' in fields:
+        columns.add(Comment.post_id)
+        options.append(db.joinedload(Comment.post).load_only(Post.id, Post.title))
+    return query.options(db.load_only(*columns), *options)
+
+def admin_post_query(projection):
+    # The admin 'content' key is a preview, so it is always an excerpt
+    fields = tuple('excerpt' if name == 'content' else name for name in projection.fields)
+    return project_post_query(Post.query, fields, projection.excerpt)
+
+def serialize_post_fields(post, projection):
+    result = {}
+    for name in projection.fields:
+        if name == 'excerpt':
+            value = truncate_excerpt(post.excerpt, projection.excerpt)
+        elif name == 'image_variants':
+            value = image_variants(post.image_url)
+        elif name == 'author':
+            value = {'id': post.author.id, 'username': post.author.username}
+        elif name == 'tags':
+            value = [tag.name for tag in post.tags]
+        elif name == 'created_at':
+            value = post.created_at.isoformat()
+        else:
+            value = getattr(post, name)
+        result[name] = value
+    return result
+
+def serialize_post_detail(post, projection, thread=None):
+    """A post plus, when 'comments' is projected, the first page of its
+    thread as returned by comment_thread_page."""
+    result = serialize_post_fields(post, projection._replace(
+        fields=tuple(name for name in projection.fields if name != 'comments')
+    ))
+    if thread is not None:
+        comments, next_cursor, has_more = thread
+        result.update({
+            'comments': [serialize_comment(comment) for comment in comments],
+            'comments_next_cursor': next_cursor,
+            'comments_has_more': has_more
+        })
+    return result
+
+def serialize_post_summary(post):
+    return serialize_post_fields(post, Projection(POST_SUMMARY_FIELDS, None))
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'content': comment.content,
+        'author': {
+            'id': comment.author.id,
+            'username': comment.author.username
+        },
+        'created_at': comment.created_at.isoformat()
+    }
+
+def serialize_admin_post(post, projection=Projection(ADMIN_POST_FIELDS, DEFAULT_EXCERPT_LENGTH)):
+    result = {}
+    for name in projection.fields:
+        if name == 'content':
+            value = truncate_excerpt(post.excerpt, projection.excerpt)
+        elif name == 'author':
+            value = post.author.username
+        elif name == 'tags':
+            value = [tag.name for tag in post.tags]
+        elif name == 'created_at':
+            value = post.created_at.isoformat()
+        else:
+            value = getattr(post, name)
+        result[name] = value
+    return result
+
+def serialize_admin_comment(comment, projection=Projection(ADMIN_COMMENT_FIELDS, None)):
+    result = {}
+    for name in projection.fields:
+        if name == 'content':
+            if projection.excerpt is None:
+                value = comment.content
+            else:
+                value = truncate_excerpt(comment.excerpt, projection.excerpt)
+        elif name == 'author':
+            value = comment.author.username
+        elif name == 'post_title':
+            value = comment.post.title
+        elif name == 'created_at':
+            value = comment.created_at.isoformat()
+        else:
+            value = getattr(comment, name)
+        result[name] = value
+    return result
+
+def serialize_admin_user(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'created_at': user.created_at.isoformat(),
+        'posts_count': user.posts_count,
+        'comments_count': user.comments_count
+    }
+
+# Response cache
+# Public GET endpoints are cached under invalidation namespaces ('posts',
+# 'post:<id>'); write routes invalidate the namespaces they touch.
+def create_response_cache():
+    ttl = app.config['RESPONSE_CACHE_TTL']
+    if app.config['RESPONSE_CACHE_BACKEND'] == 'shared':
+        url = app.config['RESPONSE_CACHE_URL']
+        if url:
+            import redis
+            client = redis.Redis.from_url(url)
+        else:
+            client = LocalSharedClient()
+        return ResponseCache(SharedCache(client, ttl=ttl))
+    return ResponseCache(LRUCache(app.config['RESPONSE_CACHE_MAX_ENTRIES'], ttl))
+
+response_cache = create_response_cache()
+
+def encode_cache_entry(mimetype, encoding, body):
+    return f"{mimetype}\n{encoding or ''}\n".encode() + body
+
+def decode_cache_entry(entry):
+    mimetype, encoding, body = entry.split(b'\n', 2)
+    return mimetype.decode(), encoding.decode() or None, body
+
+def response_cache_key(namespaces, path, args):
+    query = urlencode(sorted(args.items(multi=True)))
+    return response_cache.make_key(namespaces, f'{path}?{query}')
+
+def cache_lookup(key, encoding):
+    """Return the cached (mimetype, content_encoding, body) for ``key``, or None.
+
+    The uncompressed body is stored under ``key`` and each negotiated
+    encoding under ``key|encoding`` once it has been produced.
+    """
+    variant_key = f'{key}|{encoding}'
+    cached = response_cache.get(variant_key) if encoding else None
+    if cached is None:
+        cached = response_cache.get(key)
+        if cached is not None and encoding:
+            mimetype, _, body = decode_cache_entry(cached)
+            cached = encode_cache_entry(mimetype, *encode_body(body, encoding))
+            response_cache.set(variant_key, cached)
+    return decode_cache_entry(cached) if cached is not None else None
+
+def cache_store(key, encoding, mimetype, body):
+    """Cache a freshly rendered body; returns the (content_encoding, body) to send."""
+    response_cache.set(key, encode_cache_entry(mimetype, None, body))
+    if not encoding:
+        return None, body
+    content_encoding, encoded = encode_body(body, encoding)
+    response_cache.set(f'{key}|{encoding}', encode_cache_entry(mimetype, content_encoding, encoded))
+    return content_encoding, encoded
+
+def cached_response(namespaces):
+    """Serve a GET view from ``response_cache``.
+
+    ``namespaces`` is called with the view's arguments and returns the
+    invalidation namespaces the response depends on.
+    """
+    from functools import wraps
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = response_cache_key(namespaces(**kwargs), request.path, request.args)
+            encoding = negotiated_encoding()
+            cached = cache_lookup(key, encoding)
+            if cached is not None:
+                mimetype, content_encoding, body = cached
+                response = Response(body, mimetype=mimetype)
+                if content_encoding:
+                    response.headers['Content-Encoding'] = content_encoding
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            
+            response = app.make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                content_encoding, body = cache_store(key, encoding, response.mimetype, response.get_data())
+                if content_encoding:
+                    response.set_data(body)
+                    response.headers['Content-Encoding'] = content_encoding
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated
+    return decorator
+
+# Pagination helpers
+# Cursor mode pages on (created_at, id) instead of OFFSET, so deep pages cost
+# the same as the first one. Cursors are opaque to clients.
+MAX_PER_PAGE = 100
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at, row_id, direction):
+    raw = json.dumps([created_at.isoformat(), row_id, direction])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ('next', 'prev'):
+            raise InvalidCursor(cursor)
+        return datetime.fromisoformat(created_at), int(row_id), direction
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+
+def wants_cursor_pagination(args=None):
+    args = request.args if args is None else args
+    return 'cursor' in args or args.get('paginate') == 'cursor'
+
+def requested_per_page(default, args=None):
+    """``per_page`` from the query string, clamped to 1..MAX_PER_PAGE; an
+    unclamped value below 1 would reach LIMIT per_page + 1 as no limit."""
+    args = request.args if args is None else args
+    return max(1, min(args.get('per_page', default, type=int), MAX_PER_PAGE))
+
+def wants_total(default, args=None):
+    args = request.args if args is None else args
+    value = args.get('include_total')
+    if value is None:
+        return default
+    return value.lower() not in ('0', 'false', 'no')
+
+def keyset_page(query, model, per_page, cursor=None):
+    """Return (items, next_cursor, prev_cursor) for a newest-first listing.
+
+    ``next_cursor`` walks towards older rows and ``prev_cursor`` towards newer
+    ones; either is None when there is nothing further in that direction.
+    """
+    query, direction = keyset_window(query, model, per_page, cursor)
+    return keyset_result(query.all(), per_page, direction, cursor)
+
+def keyset_window(query, model, per_page, cursor=None):
+    """Filter, order and limit a Query or select() for one page after
+    ``cursor``; returns (query, direction)."""
+    direction = 'next'
+    if cursor:
+        created_at, row_id, direction = decode_cursor(cursor)
+        if direction == 'next':
+            query = query.where(db.or_(
+                model.created_at < created_at,
+                db.and_(model.created_at == created_at, model.id < row_id)
+            ))
+        else:
+            query = query.where(db.or_(
+                model.created_at > created_at,
+                db.and_(model.created_at == created_at, model.id > row_id)
+            ))
+
+    if direction == 'next':
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+    return query.limit(per_page + 1), direction
+
+def keyset_result(items, per_page, direction, cursor=None):
+    """Turn the rows fetched for a keyset_window into (items, next_cursor, prev_cursor)."""
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if direction == 'prev':
+        items.reverse()
+
+    if not items:
+        return items, None, None
+
+    first, last = items[0], items[-1]
+    more_older = has_more if direction == 'next' else bool(cursor)
+    more_newer = bool(cursor) if direction == 'next' else has_more
+    next_cursor = encode_cursor(last.created_at, last.id, 'next') if more_older else None
+    prev_cursor = encode_cursor(first.created_at, first.id, 'prev') if more_newer else None
+    return items, next_cursor, prev_cursor
+
+# Comment threads
+# Comments read oldest first on (created_at, id). A page's next_cursor marks
+# its last comment and is returned even when nothing follows yet, so clients
+# at the end of a thread can keep polling with it for newer comments.
+COMMENTS_PER_PAGE = 20
+
+def comment_thread_page(post_id, per_page, cursor=None):
+    """Return (comments, next_cursor, has_more) for comments after ``cursor``."""
+    items = db.session.scalars(comment_thread_statement(post_id, per_page, cursor)).all()
+    return comment_thread_result(items, per_page, cursor)
+
+def comment_thread_statement(post_id, per_page, cursor=None):
+    statement = db.select(Comment).options(db.joinedload(Comment.author)).where(Comment.post_id == post_id)
+    if cursor:
+        created_at, row_id, _ = decode_cursor(cursor)
+        statement = statement.where(db.or_(
+            Comment.created_at > created_at,
+            db.and_(Comment.created_at == created_at, Comment.id > row_id)
+        ))
+    return statement.order_by(Comment.created_at.asc(), Comment.id.asc()).limit(per_page + 1)
+
+def comment_thread_result(items, per_page, cursor=None):
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id, 'next') if items else cursor
+    return items, next_cursor, has_more
+
+# Query plan check
+# The hot read queries, which must all be served by indexes. Run
+# `flask check-query-plans` after schema changes; it exits non-zero if any
+# of them falls back to a full table scan, or to a temporary sort where the
+# index should provide the order. The tag-filtered listing is allowed to sort
+# because it only sorts the posts carrying that tag.
+def hot_queries():
+    now = datetime.utcnow()
+    after_cursor = db.or_(Post.created_at < now, db.and_(Post.created_at == now, Post.id < 1))
+    # Built as get_posts builds them, with the default projection
+    listing = lambda: project_post_query(Post.query, POST_SUMMARY_FIELDS)
+    return [
+        ('post listing', False, listing().order_by(Post.created_at.desc()).limit(10)),
+        ('post listing (cursor)', False, listing().filter(after_cursor)
+            .order_by(Post.created_at.desc(), Post.id.desc()).limit(11)),
+        ('tag-filtered listing', True, listing().join(Post.tags).filter(Tag.name == 'x')
+            .order_by(Post.created_at.desc()).limit(10)),
+        ('post comments', False, Comment.query.filter_by(post_id=1)
+            .order_by(Comment.created_at.asc(), Comment.id.asc()).limit(20)),
+        ('post comments (cursor)', False, Comment.query.filter(Comment.post_id == 1, db.or_(
+            Comment.created_at > now, db.and_(Comment.created_at == now, Comment.id > 1)))
+            .order_by(Comment.created_at.asc(), Comment.id.asc()).limit(21)),
+        ('author recent posts', False, Post.query.filter_by(author_id=1)
+            .order_by(Post.created_at.desc()).limit(5)),
+        ('post listing (excerpt)', False, project_post_query(Post.query, ('title', 'excerpt', 'author', 'tags'), 200)
+            .order_by(Post.created_at.desc()).limit(10)),
+        ('admin comment listing', False, project_comment_query(Comment.query, ADMIN_COMMENT_FIELDS)
+            .order_by(Comment.created_at.desc()).limit(20)),
+        ('user comment history', False, Comment.query.filter_by(author_id=1)),
+        ('posts showing an upload', False, Post.query.with_entities(Post.id)
+            .filter(Post.image_url.in_([f'{UPLOAD_URL_PREFIX}x.png', f'{UPLOAD_URL_PREFIX}x.jpg']))),
+    ]
+
+def explain_query_plan(query):
+    """Return the EXPLAIN QUERY PLAN detail lines for an ORM query (SQLite only)."""
+    compiled = query.statement.compile(dialect=sqlite_dialect(paramstyle='named'),
+                                       compile_kwargs={'render_postcompile': True})
+    params = {key: value.isoformat(' ') if isinstance(value, datetime) else value
+              for key, value in compiled.params.items()}
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}'), params)
+    return [row[-1] for row in rows]
+
+def plan_problems(plan, allow_sort=False):
+    problems = []
+    for detail in plan:
+        if detail.startswith('SCAN ') and ' USING ' not in detail:
+            problems.append(detail)
+        elif detail.startswith('USE TEMP B-TREE') and not allow_sort:
+            problems.append(detail)
+    return problems
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Verify that each hot query is served by an index."""
+    if db.engine.dialect.name != 'sqlite':
+        print('EXPLAIN QUERY PLAN checks only run against SQLite')
+        return
+    failures = 0
+    for name, allow_sort, query in hot_queries():
+        plan = explain_query_plan(query)
+        problems = plan_problems(plan, allow_sort)
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok'}  {name}")
+        for detail in plan:
+            print(f'      {detail}')
+    if failures:
+        raise SystemExit(f'{failures} queries are not fully indexed')
+
+# Streaming export helpers
+# Admin exports iterate with server-side batches and write each row as it is
+# serialized, so memory stays flat regardless of table size.
+EXPORT_BATCH_SIZE = 1000
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'stream': 'application/json'
+}
+
+def requested_stream_format():
+    fmt = request.args.get('format')
+    if fmt in STREAM_FORMATS:
+        return fmt
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        return 'ndjson'
+    return None
+
+def stream_export(query, serialize, fmt):
+    def generate():
+        if fmt == 'ndjson':
+            for row in query.yield_per(EXPORT_BATCH_SIZE):
+                yield app.json.dumps(serialize(row)) + '\n'
+            return
+        
+        # Chunked JSON array
+        yield '['
+        separator = ''
+        for row in query.yield_per(EXPORT_BATCH_SIZE):
+            yield separator + app.json.dumps(serialize(row))
+            separator = ','
+        yield ']'
+    
+    return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[fmt])
+
+@app.errorhandler(InvalidCursor)
+def handle_invalid_cursor(e):
+    return jsonify({'error': 'Invalid cursor'}), 400
+
+@app.errorhandler(InvalidProjection)
+def handle_invalid_projection(e):
+    return jsonify({'error': str(e)}), 400
+
+@app.errorhandler(InvalidModerationFilter)
+def handle_invalid_moderation_filter(e):
+    return jsonify({'error': str(e)}), 400
 
 # API Routes
 # Admin Authentication Routes
@@ -175,34 +2193,7 @@ def landing_page():
     if not session.get('admin_logged_in'):
         return redirect(url_for('admin_login'))
     
-    # Get real statistics from database
-    total_users = User.query.count()
-    total_posts = Post.query.count()
-    total_comments = Comment.query.count()
-    
-    # Get recent posts (last 7 days)
-    week_ago = datetime.now() - timedelta(days=7)
-    recent_posts = Post.query.filter(Post.created_at >= week_ago).count()
-    
-    # Get posts with comments (engagement)
-    posts_with_comments = Post.query.filter(Post.comments.any()).count()
-    engagement_rate = (posts_with_comments / total_posts * 100) if total_posts > 0 else 0
-    
-    # Get pending comments (if you add a status field later)
-    pending_comments = 0  # For now, all comments are approved
-    
-    # Get recent comments
-    recent_comments = Comment.query.filter(Comment.created_at >= week_ago).count()
-    
-    stats = {
-        'total_users': total_users,
-        'total_posts': total_posts,
-        'total_comments': total_comments,
-        'recent_posts': recent_posts,
-        'recent_comments': recent_comments,
-        'engagement_rate': round(engagement_rate, 1),
-        'pending_comments': pending_comments
-    }
+    stats = read_stats()
     
     return render_template('landing.html', year=datetime.now().year, stats=stats)
     
@@ -248,6 +2239,8 @@ def login():
     user = User.query.filter_by(username=data['username']).first()
     
     if user and user.check_password(data['password']):
+        if db.session.is_modified(user):
+            db.session.commit()
         token = generate_token(user.id)
         return jsonify({
             'message': 'Login successful',
@@ -261,6 +2254,13 @@ def login():
     
     return jsonify({'error': 'Invalid credentials'}), 401
 
+@app.route('/api/logout', methods=['POST'])
+@token_required
+def logout():
+    from flask import g
+    revoke_token(g.token)
+    return jsonify({'message': 'Logged out successfully'})
+
 @app.route('/api/user', methods=['GET'])
 @token_required
 def get_user():
@@ -273,64 +2273,75 @@ def get_user():
 
 # Posts Routes
 @app.route('/api/posts', methods=['GET'])
+@read_only
+@cached_response(lambda: ('posts',))
 def get_posts():
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    per_page = requested_per_page(10)
     tag_filter = request.args.get('tag')
+    projection = requested_post_projection()
     
-    query = Post.query
+    query = project_post_query(Post.query, projection.fields, projection.excerpt)
     
     # Filter by tag if provided
     if tag_filter:
         query = query.join(Post.tags).filter(Tag.name == tag_filter)
     
+    if wants_cursor_pagination():
+        items, next_cursor, prev_cursor = keyset_page(
+            query, Post, per_page, request.args.get('cursor')
+        )
+        result = {
+            'posts': [serialize_post_fields(post, projection) for post in items],
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'per_page': per_page
+        }
+        if wants_total(False):
+            result['total'] = query.order_by(None).count()
+        return jsonify(result)
+    
+    include_total = wants_total(True)
     posts = query.order_by(Post.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+        page=page, per_page=per_page, error_out=False, count=include_total
     )
     
     return jsonify({
-        'posts': [{
-            'id': post.id,
-            'title': post.title,
-            'content': post.content,
-            'image_url': post.image_url,
-            'author': {
-                'id': post.author.id,
-                'username': post.author.username
-            },
-            'tags': [tag.name for tag in post.tags],
-            'comments_count': len(post.comments),
-            'created_at': post.created_at.isoformat()
-        } for post in posts.items],
+        'posts': [serialize_post_fields(post, projection) for post in posts.items],
         'total': posts.total,
-        'pages': posts.pages,
+        'pages': posts.pages if include_total else None,
         'current_page': page
     })
 
 @app.route('/api/posts/<int:post_id>', methods=['GET'])
+@read_only
+@cached_response(lambda post_id: (f'post:{post_id}',))
 def get_post(post_id):
-    post = Post.query.get_or_404(post_id)
+    projection = requested_post_projection(POST_FIELDS + ('comments',), POST_DETAIL_FIELDS)
+    post = project_post_query(Post.query, projection.fields, projection.excerpt) \
+        .filter(Post.id == post_id).first_or_404()
+    thread = None
+    if 'comments' in projection.fields:
+        # Only the first page of the thread; the rest comes from /comments
+        thread = comment_thread_page(post_id, COMMENTS_PER_PAGE)
+    return jsonify(serialize_post_detail(post, projection, thread))
+
+@app.route('/api/posts/<int:post_id>/comments', methods=['GET'])
+@read_only
+@cached_response(lambda post_id: (f'post:{post_id}',))
+def get_comments(post_id):
+    per_page = requested_per_page(COMMENTS_PER_PAGE)
+    if db.session.query(Post.id).filter_by(id=post_id).first() is None:
+        return jsonify({'error': 'Post not found'}), 404
     
+    comments, next_cursor, has_more = comment_thread_page(
+        post_id, per_page, request.args.get('cursor')
+    )
     return jsonify({
-        'id': post.id,
-        'title': post.title,
-        'content': post.content,
-        'image_url': post.image_url,
-        'author': {
-            'id': post.author.id,
-            'username': post.author.username
-        },
-        'tags': [tag.name for tag in post.tags],
-        'comments': [{
-            'id': comment.id,
-            'content': comment.content,
-            'author': {
-                'id': comment.author.id,
-                'username': comment.author.username
-            },
-            'created_at': comment.created_at.isoformat()
-        } for comment in post.comments],
-        'created_at': post.created_at.isoformat()
+        'comments': [serialize_comment(comment) for comment in comments],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'per_page': per_page
     })
 
 @app.route('/api/posts', methods=['POST'])
@@ -348,15 +2359,13 @@ def create_post():
     
     # Handle tags
     if 'tags' in data:
-        for tag_name in data['tags']:
-            tag = Tag.query.filter_by(name=tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.session.add(tag)
-            post.tags.append(tag)
+        post.tags = resolve_tags(data['tags'])
     
     db.session.add(post)
+    db.session.flush()
+    index_post(post)
     db.session.commit()
+    response_cache.invalidate('posts')
     
     return jsonify({
         'message': 'Post created successfully',
@@ -388,15 +2397,12 @@ def update_post(post_id):
     
     # Update tags
     if 'tags' in data:
-        post.tags.clear()
-        for tag_name in data['tags']:
-            tag = Tag.query.filter_by(name=tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.session.add(tag)
-            post.tags.append(tag)
+        post.tags = resolve_tags(data['tags'])
     
+    db.session.flush()
+    index_post(post)
     db.session.commit()
+    response_cache.invalidate('posts', f'post:{post_id}')
     
     return jsonify({'message': 'Post updated successfully'})
 
@@ -410,101 +2416,271 @@ def delete_post(post_id):
     if post.author_id != g.current_user.id:
         return jsonify({'error': 'Not authorized'}), 403
     
-    db.session.delete(post)
+    # Set-based, so a post with a long comment thread isn't loaded and
+    # deleted one comment at a time through the ORM cascade
+    delete_post_batch([post_id])
     db.session.commit()
+    response_cache.invalidate('posts', f'post:{post_id}')
     
     return jsonify({'message': 'Post deleted successfully'})
 
+# Comment write-behind queue
+# In 'queued' mode comments are validated in the request, stamped with their
+# acceptance time by the queue (in ticket order, so created_at and id agree
+# for keyset cursors) and written by the queue's flusher thread in one
+# transaction per batch. They go through the ORM so the counter, rollup and
+# feed listeners apply exactly as for a synchronous insert.
+def write_comment_batch(rows):
+    with app.app_context():
+        post_ids = {row['post_id'] for row in rows}
+        existing = set(db.session.execute(
+            db.select(Post.id).where(Post.id.in_(post_ids))
+        ).scalars())
+        comments = [Comment(**row) for row in rows if row['post_id'] in existing]
+        if len(comments) < len(rows):
+            logging.getLogger('blog.comments').warning(
+                'dropped %d queued comments on deleted posts', len(rows) - len(comments))
+        db.session.add_all(comments)
+        db.session.commit()
+        response_cache.invalidate('posts', *sorted(f'post:{post_id}' for post_id in existing))
+
+comment_queue = WriteBehindQueue(
+    write_comment_batch,
+    max_batch=app.config['COMMENT_QUEUE_MAX_BATCH'],
+    max_delay=app.config['COMMENT_QUEUE_MAX_DELAY_MS'] / 1000,
+    max_pending=app.config['COMMENT_QUEUE_MAX_PENDING'],
+    name='comment-writer',
+    stamp_field='created_at'
+)
+# Drain accepted comments on a clean shutdown
+atexit.register(comment_queue.close)
+
 # Comments Routes
 @app.route('/api/posts/<int:post_id>/comments', methods=['POST'])
 @token_required
 def create_comment(post_id):
-    from flask import g
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
+    content = (data.get('content') or '').strip()
+    if not content:
+        return jsonify({'error': 'Content is required'}), 400
+    if db.session.query(Post.id).filter_by(id=post_id).first() is None:
+        return jsonify({'error': 'Post not found'}), 404
+    
+    author = {'id': g.current_user.id, 'username': g.current_user.username}
+    
+    if app.config['COMMENT_WRITE_MODE'] == 'queued':
+        row = {'content': content, 'author_id': author['id'], 'post_id': post_id}
+        ticket = comment_queue.submit(row)
+        return jsonify({
+            'message': 'Comment accepted',
+            'ticket': ticket,
+            'comment': {
+                'id': None,
+                'status': 'pending',
+                'content': content,
+                'author': author,
+                'created_at': row['created_at'].isoformat()
+            }
+        }), 202
     
     comment = Comment(
-        content=data['content'],
-        author_id=g.current_user.id,
+        content=content,
+        author_id=author['id'],
         post_id=post_id
     )
     
     db.session.add(comment)
     db.session.commit()
+    response_cache.invalidate('posts', f'post:{post_id}')
     
     return jsonify({
         'message': 'Comment added successfully',
         'comment': {
             'id': comment.id,
             'content': comment.content,
-            'author': {
-                'id': comment.author.id,
-                'username': comment.author.username
-            },
+            'author': author,
             'created_at': comment.created_at.isoformat()
         }
     }), 201
 
+# Search Routes
+@app.route('/api/search', methods=['GET'])
+def search_posts():
+    if not search_available():
+        return jsonify({'error': 'Search is not available'}), 503
+    
+    q = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = requested_per_page(10)
+    match = build_match_query(q)
+    if not match:
+        return jsonify({'error': 'Query is required'}), 400
+    
+    # Weight title and tag hits above body hits
+    rows = db.session.execute(db.text(
+        f"SELECT rowid, highlight({SEARCH_TABLE}, 0, :open, :close) AS title, "
+        f"snippet({SEARCH_TABLE}, 1, :open, :close, '...', 24) AS snippet, "
+        f"bm25({SEARCH_TABLE}, 10.0, 1.0, 5.0) AS rank "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match "
+        "ORDER BY rank LIMIT :limit OFFSET :offset"
+    ), {'match': match, 'open': MATCH_OPEN, 'close': MATCH_CLOSE,
+        'limit': per_page, 'offset': (page - 1) * per_page}).all()
+    
+    post_ids = [row.rowid for row in rows]
+    posts = {post.id: post for post in post_listing_query().filter(Post.id.in_(post_ids))}
+    
+    results = []
+    for row in rows:
+        post = posts.get(row.rowid)
+        if post is None:
+            continue
+        result = serialize_post_summary(post)
+        result.update({
+            'highlighted_title': mark_matches(row.title),
+            'snippet': mark_matches(row.snippet),
+            'score': -row.rank
+        })
+        results.append(result)
+    
+    return jsonify({
+        'query': q,
+        'results': results,
+        'current_page': page
+    })
+
 # Tags Routes
+def requested_tag_limit(default):
+    limit = request.args.get('limit', default, type=int)
+    return None if limit is None else max(1, min(limit, TAG_LIMIT_MAX))
+
 @app.route('/api/tags', methods=['GET'])
+@read_only
 def get_tags():
-    tags = Tag.query.all()
-    return jsonify([{'id': tag.id, 'name': tag.name} for tag in tags])
+    # Served from the in-memory index, so no response cache in front
+    index = current_tag_index()
+    prefix = request.args.get('prefix', '').strip()
+    if prefix:
+        return jsonify(index.search(prefix, requested_tag_limit(10)))
+    return jsonify(index.all(requested_tag_limit(None)))
+
+@app.route('/api/tags/trending', methods=['GET'])
+@read_only
+def get_trending_tags():
+    return jsonify(current_tag_index().trending(requested_tag_limit(10)))
 
 # Upload Routes
 @app.route('/api/upload', methods=['POST'])
 @token_required
 def upload_file():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
-    
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    
-    if file:
-        filename = secure_filename(file.filename)
-        # Add timestamp to make filename unique
-        filename = f"{uuid.uuid4()}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+    # Multipart form uploads, or a raw request body (e.g. Content-Type:
+    # image/png) named by ?filename=, which streams without form parsing
+    if request.mimetype == 'multipart/form-data':
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
         
-        return jsonify({
-            'message': 'File uploaded successfully',
-            'filename': filename,
-            'url': f'/uploads/{filename}'
-        })
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        original_name, stream = file.filename, file.stream
+    else:
+        original_name = request.args.get('filename', '')
+        if not request.content_length:
+            return jsonify({'error': 'No file provided'}), 400
+        stream = request.stream
+    
+    extension = normalize_extension(secure_filename(original_name))
+    filename, digest, size, created = upload_store.save(stream, extension)
+    now = datetime.utcnow()
+    table = Upload.__table__
+    _insert_ignore(db.session.connection(), table, [{
+        'filename': filename,
+        'size': size,
+        'ref_count': 0,
+        'created_at': now,
+        'last_uploaded_at': now
+    }])
+    if not created:
+        # Restart the grace period for this uploader, who hasn't posted yet
+        db.session.execute(table.update().where(table.c.filename == filename)
+                           .values(last_uploaded_at=now))
+    db.session.commit()
+    derivatives.schedule(upload_store.path(filename), digest)
+    
+    return jsonify({
+        'message': 'File uploaded successfully',
+        'filename': filename,
+        'url': f'{UPLOAD_URL_PREFIX}{filename}',
+        'variants': derivatives.variant_urls(digest, UPLOAD_URL_PREFIX),
+        'sha256': digest,
+        'size': size,
+        'deduplicated': not created
+    })
+
+# Content-addressed names never change meaning, so they are cached for a
+# year as immutable with the hash as a strong ETag. Older uuid-named uploads
+# get a short max-age and revalidate.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LEGACY_UPLOAD_MAX_AGE = 3600
+
+def serve_upload(directory, filename, etag=None):
+    immutable = etag is not None
+    max_age = IMMUTABLE_MAX_AGE if immutable else LEGACY_UPLOAD_MAX_AGE
+    
+    if app.config['UPLOADS_SERVE_MODE'] == 'x-accel':
+        path = safe_join(directory, filename)
+        if path is None or not os.path.isfile(path):
+            return jsonify({'error': 'Not found'}), 404
+        # nginx serves the bytes (including ranges) from its internal location
+        relative = os.path.relpath(path, app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = app.config['UPLOADS_ACCEL_PREFIX'] + relative
+        if etag:
+            response.set_etag(etag)
+    else:
+        # conditional=True answers If-None-Match with 304 and Range with 206
+        response = send_from_directory(directory, filename, etag=etag or True,
+                                       max_age=max_age, conditional=True)
+    
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
 
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    etag = filename[:64] if is_hashed_name(filename) else None
+    return serve_upload(app.config['UPLOAD_FOLDER'], filename, etag)
+
+@app.route('/uploads/variants/<filename>')
+def uploaded_variant(filename):
+    parsed = derivatives.parse_variant(filename)
+    if parsed is None or not derivatives.available:
+        return jsonify({'error': 'Not found'}), 404
+    
+    # Variants normally exist already; generate any that are still missing
+    digest, width = parsed
+    source = next((name for name, _ in digest_uploads(digest) if is_hashed_name(name)), None)
+    if source is None or derivatives.ensure(upload_store.path(source), digest, width) is None:
+        return jsonify({'error': 'Not found'}), 404
+    return serve_upload(derivatives.root, filename, etag=filename.rsplit('.', 1)[0])
 
 # Dashboard Routes
 @app.route('/api/dashboard', methods=['GET'])
 @token_required
 def get_dashboard():
     from flask import g
-    user = g.current_user
-    
-    # Get user's posts count
-    posts_count = Post.query.filter_by(author_id=user.id).count()
-    
-    # Get user's comments count
-    comments_made = Comment.query.filter_by(author_id=user.id).count()
-    
-    # Get comments on user's posts
-    user_posts = Post.query.filter_by(author_id=user.id).all()
-    comments_received = 0
-    for post in user_posts:
-        comments_received += Comment.query.filter_by(post_id=post.id).count()
+    user = db.session.get(User, g.current_user.id)
     
     # Get recent posts
     recent_posts = Post.query.filter_by(author_id=user.id).order_by(Post.created_at.desc()).limit(5).all()
     
     return jsonify({
         'stats': {
-            'posts_count': posts_count,
-            'comments_made': comments_made,
-            'comments_received': comments_received
+            'posts_count': user.posts_count,
+            'comments_made': user.comments_count,
+            'comments_received': user.comments_received
         },
         'recent_posts': [{
             'id': post.id,
@@ -513,11 +2689,62 @@ def get_dashboard():
         } for post in recent_posts]
     })
 
-# RSS Feed Route
-@app.route('/api/rss')
-def rss_feed():
-    # Get recent posts (last 20)
-    posts = Post.query.order_by(Post.created_at.desc()).limit(20).all()
+# RSS feed cache
+# Rendered feeds are cached per tag in each process. A transaction in this
+# process that touched posts or tags drops them at commit; writes made by
+# other workers or CLI commands show up once an entry is RSS_MAX_AGE
+# seconds old, the same window clients are told to cache for. Clients
+# revalidate with ETag/Last-Modified.
+
+RSS_FEED_SIZE = 20
+RSS_CACHE_MAX_FEEDS = 256
+RSS_MAX_AGE = 60
+
+# Cached feeds also keep their compressed bodies, keyed by encoding
+FeedEntry = namedtuple('FeedEntry', ['body', 'etag', 'last_modified', 'encoded', 'expires'])
+
+_rss_cache = {}
+_rss_cache_lock = threading.Lock()
+
+def invalidate_rss_cache():
+    with _rss_cache_lock:
+        _rss_cache.clear()
+
+@db.event.listens_for(db.session, 'after_flush')
+def track_feed_changes(session, flush_context):
+    for objects in (session.new, session.dirty, session.deleted):
+        if any(isinstance(obj, (Post, Tag)) for obj in objects):
+            session.info['feed_changed'] = True
+            return
+
+@db.event.listens_for(db.session, 'after_commit')
+def expire_feed_cache(session):
+    if session.info.pop('feed_changed', False):
+        invalidate_rss_cache()
+
+@db.event.listens_for(db.session, 'after_rollback')
+def discard_feed_changes(session):
+    session.info.pop('feed_changed', None)
+
+def render_rss(tag_filter=None):
+    """Build the feed document; returns (body, etag, last_modified)."""
+    query = post_listing_query()
+    if tag_filter:
+        query = query.join(Post.tags).filter(Tag.name == tag_filter)
+    posts = query.order_by(Post.created_at.desc()).limit(RSS_FEED_SIZE).all()
+    
+    # Derive the build date from the content so every worker renders the
+    # same bytes (and therefore the same ETag) for the same posts.
+    last_modified = max(
+        (post.updated_at or post.created_at for post in posts),
+        default=datetime(1970, 1, 1)
+    ).replace(microsecond=0)
+    
+    self_link = "http://localhost:8000/api/rss"
+    title = "Blog Platform RSS Feed"
+    if tag_filter:
+        self_link += "?" + urlencode({'tag': tag_filter})
+        title += f" - {tag_filter}"
     
     # Create RSS XML
     rss = ET.Element("rss")
@@ -527,15 +2754,15 @@ def rss_feed():
     channel = ET.SubElement(rss, "channel")
     
     # Channel information
-    ET.SubElement(channel, "title").text = "Blog Platform RSS Feed"
+    ET.SubElement(channel, "title").text = title
     ET.SubElement(channel, "description").text = "Latest blog posts from our platform"
     ET.SubElement(channel, "link").text = "http://localhost:8000"
     ET.SubElement(channel, "language").text = "en-us"
-    ET.SubElement(channel, "lastBuildDate").text = datetime.now().strftime("%a, %d %b %Y %H:%M:%S GMT")
+    ET.SubElement(channel, "lastBuildDate").text = last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT")
     
     # Add atom:link for self-reference
     atom_link = ET.SubElement(channel, "atom:link")
-    atom_link.set("href", "http://localhost:8000/api/rss")
+    atom_link.set("href", self_link)
     atom_link.set("rel", "self")
     atom_link.set("type", "application/rss+xml")
     
@@ -553,10 +2780,46 @@ def rss_feed():
         for tag in post.tags:
             ET.SubElement(item, "category").text = tag.name
     
-    # Convert to string
-    rss_str = ET.tostring(rss, encoding='unicode', method='xml')
+    body = ET.tostring(rss, encoding='utf-8', method='xml')
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    return body, etag, last_modified
+
+def get_cached_rss(tag_filter=None):
+    with _rss_cache_lock:
+        entry = _rss_cache.get(tag_filter)
+    if entry is not None and entry.expires > time.monotonic():
+        return entry
+    
+    entry = FeedEntry(*render_rss(tag_filter), encoded={},
+                      expires=time.monotonic() + RSS_MAX_AGE)
+    with _rss_cache_lock:
+        _rss_cache.pop(tag_filter, None)
+        if len(_rss_cache) >= RSS_CACHE_MAX_FEEDS:
+            _rss_cache.pop(next(iter(_rss_cache)))
+        _rss_cache[tag_filter] = entry
+    return entry
+
+# RSS Feed Route
+@app.route('/api/rss')
+@read_only
+def rss_feed():
+    tag_filter = request.args.get('tag') or None
+    entry = get_cached_rss(tag_filter)
     
-    return Response(rss_str, mimetype='application/rss+xml')
+    encoding = negotiated_encoding()
+    if encoding not in entry.encoded:
+        entry.encoded[encoding] = encode_body(entry.body, encoding)
+    content_encoding, body = entry.encoded[encoding]
+    
+    response = Response(body, mimetype='application/rss+xml')
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.set_etag(entry.etag, weak=content_encoding is not None)
+    response.last_modified = entry.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = RSS_MAX_AGE
+    # Answers If-None-Match / If-Modified-Since with 304
+    return response.make_conditional(request)
 
 # Admin API Routes
 @app.route('/api/admin/users')
@@ -564,74 +2827,161 @@ def admin_get_users():
     if not session.get('admin_logged_in'):
         return jsonify({'error': 'Unauthorized'}), 401
     
+    stream_format = requested_stream_format()
+    if stream_format:
+        return stream_export(User.query.order_by(User.id), serialize_admin_user, stream_format)
+    
     users = User.query.all()
-    return jsonify([{
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'created_at': user.created_at.isoformat(),
-        'posts_count': len(user.posts),
-        'comments_count': len(user.comments)
-    } for user in users])
+    return jsonify([serialize_admin_user(user) for user in users])
 
 @app.route('/api/admin/posts')
 def admin_get_posts():
     if not session.get('admin_logged_in'):
         return jsonify({'error': 'Unauthorized'}), 401
     
-    posts = Post.query.order_by(Post.created_at.desc()).all()
-    return jsonify([{
-        'id': post.id,
-        'title': post.title,
-        'content': post.content[:200] + '...' if len(post.content) > 200 else post.content,
-        'author': post.author.username,
-        'created_at': post.created_at.isoformat(),
-        'comments_count': len(post.comments),
-        'tags': [tag.name for tag in post.tags],
-        'image_url': post.image_url
-    } for post in posts])
+    projection = requested_projection(ADMIN_POST_FIELDS, ADMIN_POST_FIELDS, DEFAULT_EXCERPT_LENGTH)
+    if wants_cursor_pagination():
+        per_page = requested_per_page(50)
+        posts, next_cursor, prev_cursor = keyset_page(
+            admin_post_query(projection), Post, per_page, request.args.get('cursor')
+        )
+        result = {
+            'posts': [serialize_admin_post(post, projection) for post in posts],
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'per_page': per_page
+        }
+        if wants_total(False):
+            result['total'] = Post.query.count()
+        return jsonify(result)
+    
+    query = admin_post_query(projection).order_by(Post.created_at.desc())
+    stream_format = requested_stream_format()
+    if stream_format:
+        return stream_export(query, lambda post: serialize_admin_post(post, projection), stream_format)
+    
+    posts = query.all()
+    return jsonify([serialize_admin_post(post, projection) for post in posts])
 
 @app.route('/api/admin/comments')
 def admin_get_comments():
     if not session.get('admin_logged_in'):
         return jsonify({'error': 'Unauthorized'}), 401
     
-    comments = Comment.query.order_by(Comment.created_at.desc()).all()
-    return jsonify([{
-        'id': comment.id,
-        'content': comment.content,
-        'author': comment.author.username,
-        'post_title': comment.post.title,
-        'created_at': comment.created_at.isoformat()
-    } for comment in comments])
+    projection = requested_projection(ADMIN_COMMENT_FIELDS, ADMIN_COMMENT_FIELDS)
+    query = project_comment_query(Comment.query, projection.fields, projection.excerpt)
+    if wants_cursor_pagination():
+        per_page = requested_per_page(50)
+        comments, next_cursor, prev_cursor = keyset_page(
+            query, Comment, per_page, request.args.get('cursor')
+        )
+        result = {
+            'comments': [serialize_admin_comment(comment, projection) for comment in comments],
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'per_page': per_page
+        }
+        if wants_total(False):
+            result['total'] = Comment.query.count()
+        return jsonify(result)
+    
+    query = query.order_by(Comment.created_at.desc())
+    stream_format = requested_stream_format()
+    if stream_format:
+        return stream_export(query, lambda comment: serialize_admin_comment(comment, projection), stream_format)
+    
+    comments = query.all()
+    return jsonify([serialize_admin_comment(comment, projection) for comment in comments])
 
-@app.route('/api/admin/stats')
-def admin_get_stats():
+def bulk_delete_request(model):
     if not session.get('admin_logged_in'):
         return jsonify({'error': 'Unauthorized'}), 401
     
-    total_users = User.query.count()
-    total_posts = Post.query.count()
-    total_comments = Comment.query.count()
-    
-    # Get recent activity (last 7 days)
-    week_ago = datetime.now() - timedelta(days=7)
-    recent_posts = Post.query.filter(Post.created_at >= week_ago).count()
-    recent_comments = Comment.query.filter(Comment.created_at >= week_ago).count()
+    filters = request.get_json(silent=True)
+    if not isinstance(filters, dict):
+        raise InvalidModerationFilter('expected a JSON object of filters')
+    dry_run = filters.pop('dry_run', False)
+    if not isinstance(dry_run, bool):
+        # A string such as "false" would otherwise read as true
+        raise InvalidModerationFilter('dry_run must be a JSON boolean')
+    summary = bulk_delete(model, filters, dry_run=dry_run)
+    return jsonify(summary), 500 if 'error' in summary else 200
+
+@app.route('/api/admin/posts/bulk-delete', methods=['POST'])
+def admin_bulk_delete_posts():
+    return bulk_delete_request(Post)
+
+@app.route('/api/admin/comments/bulk-delete', methods=['POST'])
+def admin_bulk_delete_comments():
+    return bulk_delete_request(Comment)
+
+@app.route('/api/admin/import', methods=['POST'])
+def admin_import_posts():
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
     
-    # Get engagement rate
-    posts_with_comments = Post.query.filter(Post.comments.any()).count()
-    engagement_rate = (posts_with_comments / total_posts * 100) if total_posts > 0 else 0
+    summary = import_posts(request.stream)
+    errors = summary['errors']
+    return jsonify({
+        'imported_posts': summary['posts'],
+        'imported_comments': summary['comments'],
+        'error_count': len(errors),
+        'errors': errors[:IMPORT_MAX_ERRORS]
+    })
+
+@app.route('/api/admin/cache')
+def admin_get_cache_stats():
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
     
     return jsonify({
-        'total_users': total_users,
-        'total_posts': total_posts,
-        'total_comments': total_comments,
-        'recent_posts': recent_posts,
-        'recent_comments': recent_comments,
-        'engagement_rate': round(engagement_rate, 1),
-        'pending_comments': 0  # All comments are approved for now
+        'responses': response_cache.info(),
+        'identities': dict(identity_cache.info(),
+                           user_lookups_avoided=identity_cache.stats.hits,
+                           revoked_tokens=len(_revoked_tokens))
     })
 
+@app.route('/api/admin/tag-index', methods=['GET', 'POST'])
+def admin_tag_index():
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # POST rebuilds the index from post_tags; GET reports drift against it
+    if request.method == 'POST':
+        load_tag_index()
+    current_tag_index()
+    return jsonify(dict(tag_index.info(), mismatches=[
+        {'name': name, 'indexed': indexed, 'actual': actual}
+        for name, indexed, actual in verify_tag_index()
+    ]))
+
+@app.route('/api/admin/stats')
+def admin_get_stats():
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    window = request.args.get('window', '7d')
+    if window not in STAT_WINDOWS:
+        return jsonify({'error': f"window must be one of {', '.join(STAT_WINDOWS)}"}), 400
+    
+    return jsonify(read_stats(window))
+
+@app.route('/api/admin/metrics')
+def admin_get_metrics():
+    token = app.config['METRICS_TOKEN']
+    auth_header = request.headers.get('Authorization', '')
+    scraper = bool(token) and hmac.compare_digest(auth_header, f'Bearer {token}')
+    if not scraper and not session.get('admin_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    if request.args.get('format') == 'json':
+        return jsonify(dict(request_metrics.summary(), comment_queue=comment_queue.info(),
+                            password_hasher=password_hasher.info()))
+    return Response(request_metrics.render_prometheus(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
 if __name__ == '__main__':
+    if app.config['AUTO_MIGRATE']:
+        with app.app_context():
+            prepare_database()
     app.run(debug=True, port=8000)
\ No newline at end of file
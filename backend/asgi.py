@@ -0,0 +1,270 @@
+"""ASGI entry point: the public read endpoints run on asyncio with AsyncSession,
+everything else is handed to the Flask app.
+
+    cd backend
+    pip install -r requirements-async.txt
+    uvicorn asgi:application --port 8000
+
+GET /api/posts, /api/posts/<id> and /api/posts/<id>/comments are answered
+from an async engine (aiosqlite for SQLite), so one process keeps many of
+them in flight while they wait on the database instead of holding a thread
+each. They reuse the Flask app's projection, serializers, response cache,
+compression and request metrics, and return the same bodies. Every other
+request, including all writes and logins, runs the Flask app on a thread
+pool through a WSGI adapter, so its behaviour is unchanged; password hashing
+already runs on its own bounded pool there.
+
+Both halves live in one process and share the response cache, so writes
+made through the Flask half invalidate pages the async half has cached.
+"""
+import math
+import os
+import re
+import time
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_accept_header
+from werkzeug.wrappers import Response
+
+import app as blog
+from app import COMMENTS_PER_PAGE, Post, Tag
+from database import READ_BIND, install_sqlite_pragmas
+
+# SQLAlchemy backend name -> async driver
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql'
+}
+# Threads running Flask for the requests that aren't served natively
+WSGI_WORKERS = int(os.environ.get('ASYNC_WSGI_WORKERS', 32))
+
+
+class Request:
+    def __init__(self, scope):
+        self.path = scope['path']
+        self.args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope['headers']}
+
+
+def create_engine(flask_app):
+    """An async engine on the read replica if one is configured, else the primary."""
+    with flask_app.app_context():
+        engines = blog.db.engines
+        url = (engines.get(READ_BIND) or engines[None]).url
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f'no async driver for {backend} databases')
+    engine = create_async_engine(url.set(drivername=ASYNC_DRIVERS[backend]),
+                                 **flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    install_sqlite_pragmas(engine.sync_engine, flask_app.config['SQLITE_PRAGMAS'])
+    blog.install_query_timing(engine.sync_engine)
+    return engine
+
+
+def json_response(obj, status=200):
+    response = blog.app.json.response(obj)
+    response.status_code = status
+    return response
+
+
+# Views
+# Each mirrors the Flask view of the same route and returns a Response, or
+# None to let the Flask app answer instead.
+async def list_posts(request, session):
+    args = request.args
+    page = args.get('page', 1, type=int)
+    per_page = blog.requested_per_page(10, args)
+    tag_filter = args.get('tag')
+    projection = blog.requested_post_projection(args=args)
+
+    statement = select(Post).options(*blog.post_projection_options(projection.fields, projection.excerpt))
+    count = select(func.count(Post.id)).select_from(Post)
+    if tag_filter:
+        statement = statement.join(Post.tags).where(Tag.name == tag_filter)
+        count = count.join(Post.tags).where(Tag.name == tag_filter)
+
+    if blog.wants_cursor_pagination(args):
+        cursor = args.get('cursor')
+        window, direction = blog.keyset_window(statement, Post, per_page, cursor)
+        items, next_cursor, prev_cursor = blog.keyset_result(
+            (await session.scalars(window)).all(), per_page, direction, cursor
+        )
+        result = {
+            'posts': [blog.serialize_post_fields(post, projection) for post in items],
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'per_page': per_page
+        }
+        if blog.wants_total(False, args):
+            result['total'] = await session.scalar(count)
+        return json_response(result)
+
+    # Same page normalisation as Flask-SQLAlchemy's paginate(error_out=False)
+    offset_page = max(page, 1)
+    include_total = blog.wants_total(True, args)
+    items = (await session.scalars(
+        statement.order_by(Post.created_at.desc())
+        .limit(per_page).offset((offset_page - 1) * per_page)
+    )).all()
+    total = await session.scalar(count) if include_total else None
+    return json_response({
+        'posts': [blog.serialize_post_fields(post, projection) for post in items],
+        'total': total,
+        'pages': math.ceil(total / per_page) if include_total else None,
+        'current_page': page
+    })
+
+
+async def get_post(request, session, post_id):
+    projection = blog.requested_post_projection(blog.POST_FIELDS + ('comments',), blog.POST_DETAIL_FIELDS,
+                                                args=request.args)
+    post = (await session.scalars(
+        select(Post).options(*blog.post_projection_options(projection.fields, projection.excerpt))
+        .where(Post.id == post_id).limit(1)
+    )).first()
+    if post is None:
+        return None  # Flask renders its 404 page
+    thread = None
+    if 'comments' in projection.fields:
+        items = (await session.scalars(blog.comment_thread_statement(post_id, COMMENTS_PER_PAGE))).all()
+        thread = blog.comment_thread_result(items, COMMENTS_PER_PAGE)
+    return json_response(blog.serialize_post_detail(post, projection, thread))
+
+
+async def get_comments(request, session, post_id):
+    args = request.args
+    per_page = blog.requested_per_page(COMMENTS_PER_PAGE, args)
+    if (await session.execute(select(Post.id).where(Post.id == post_id))).first() is None:
+        return json_response({'error': 'Post not found'}, 404)
+
+    cursor = args.get('cursor')
+    items = (await session.scalars(blog.comment_thread_statement(post_id, per_page, cursor))).all()
+    comments, next_cursor, has_more = blog.comment_thread_result(items, per_page, cursor)
+    return json_response({
+        'comments': [blog.serialize_comment(comment) for comment in comments],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'per_page': per_page
+    })
+
+
+# (pattern, Flask rule used as the metrics route, view, cache namespaces)
+ROUTES = (
+    (re.compile(r'/api/posts'), '/api/posts', list_posts,
+     lambda: ('posts',)),
+    (re.compile(r'/api/posts/(\d+)'), '/api/posts/<int:post_id>', get_post,
+     lambda post_id: (f'post:{post_id}',)),
+    (re.compile(r'/api/posts/(\d+)/comments'), '/api/posts/<int:post_id>/comments', get_comments,
+     lambda post_id: (f'post:{post_id}',)),
+)
+
+
+class AsyncBlog:
+    """ASGI application serving ROUTES natively and the rest through Flask."""
+
+    def __init__(self, flask_app, wsgi_workers=WSGI_WORKERS):
+        self.flask_app = flask_app
+        self.engine = create_engine(flask_app)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.wsgi = WSGIMiddleware(flask_app, workers=wsgi_workers)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, rule, view, namespaces in ROUTES:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    params = [int(value) for value in match.groups()]
+                    response = await self.dispatch(Request(scope), rule, view, namespaces, params)
+                    if response is not None:
+                        return await self.send_response(response, send)
+                    break
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispatch(self, request, rule, view, namespaces, params):
+        started = time.perf_counter()
+        stats = {'route': rule, 'queries': 0, 'time': 0.0}
+
+        key = blog.response_cache_key(namespaces(*params), request.path, request.args)
+        encoding = blog.negotiated_encoding(parse_accept_header(request.headers.get('accept-encoding')))
+        cached = blog.cache_lookup(key, encoding)
+        if cached is not None:
+            mimetype, content_encoding, body = cached
+            response = Response(body, mimetype=mimetype)
+            response.headers['X-Cache'] = 'HIT'
+        else:
+            try:
+                response = await self.run_view(view, request, params, stats)
+            except (blog.InvalidProjection, blog.InvalidCursor) as e:
+                message = 'Invalid cursor' if isinstance(e, blog.InvalidCursor) else str(e)
+                response = json_response({'error': message}, 400)
+            if response is None:
+                return None
+            content_encoding = None
+            if response.status_code == 200:
+                content_encoding, body = blog.cache_store(key, encoding, response.mimetype, response.get_data())
+                response.set_data(body)
+            response.headers['X-Cache'] = 'MISS'
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+        response.vary.add('Accept-Encoding')
+        self.add_cors_headers(request, response)
+
+        duration = time.perf_counter() - started
+        blog.request_metrics.record_request('GET', rule, response.status_code, duration,
+                                            stats['time'], stats['queries'])
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats["time"] * 1000:.1f};desc="{stats["queries"]} queries", '
+            f'app;dur={duration * 1000:.1f}'
+        )
+        return response
+
+    async def run_view(self, view, request, params, stats):
+        async with self.sessions() as session:
+            connection = (await session.connection()).sync_connection
+            connection.info['request_stats'] = stats
+            try:
+                return await view(request, session, *params)
+            finally:
+                connection.info.pop('request_stats', None)
+
+    def add_cors_headers(self, request, response):
+        # What Flask-CORS adds to the same responses in the Flask app
+        origin = request.headers.get('origin')
+        if origin and origin == self.flask_app.config['CORS_ORIGIN']:
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Access-Control-Allow-Credentials'] = 'true'
+            response.vary.add('Origin')
+
+    async def send_response(self, response, send):
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in response.headers.items()]
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+
+
+if blog.app.config['AUTO_MIGRATE']:
+    with blog.app.app_context():
+        blog.prepare_database()
+
+application = AsyncBlog(blog.app)
@@ -0,0 +1,2 @@
+"""Performance benchmarks for the blog backend. Run modules with
+``python -m benchmarks.<name>`` from the backend directory."""
@@ -0,0 +1,238 @@
+"""Compare read throughput of the sync (WSGI) and async (ASGI) entry points.
+
+    cd backend
+    pip install -r requirements-async.txt gunicorn
+    python -m benchmarks.async_compare --scale small --concurrency 16 64 256 --duration 10
+
+Both entry points serve the same generated SQLite database from a single
+process: the Flask app under gunicorn with a thread pool (--threads), and
+asgi.application under uvicorn. An asyncio client keeps ``concurrency``
+keep-alive connections busy for --duration seconds per level, mostly with
+the reads the async entry point serves natively (post pages, post detail,
+comment threads) plus --passthrough-share requests it hands to Flask (tags).
+Each request carries a unique query argument so the response cache doesn't
+answer it; pass --cached to leave the cache in play.
+
+Reports requests/s, p50/p95/p99 latency and errors for each server and
+level, and writes JSON results under benchmarks/results/ (or --output). The
+client runs in one process, so at very high rates it can become the limit;
+both servers are measured with the same client.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import datagen
+from benchmarks.load import RESULTS_DIR, git_revision
+from benchmarks.stats import summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+
+
+def server_commands(port, threads):
+    return {
+        'sync': [sys.executable, '-m', 'gunicorn', '--workers', '1', '--threads', str(threads),
+                 '--bind', f'{HOST}:{port}', '--log-level', 'warning', 'app:app'],
+        'async': [sys.executable, '-m', 'uvicorn', 'asgi:application', '--host', HOST,
+                  '--port', str(port), '--log-level', 'warning', '--no-access-log']
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(process, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'server exited with status {process.returncode}')
+        try:
+            with socket.create_connection((HOST, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f'server on port {port} did not start within {timeout}s')
+
+
+def request_paths(dataset, rng, passthrough_share, cached):
+    """An endless sequence of GET paths over the dataset."""
+    serial = 0
+    while True:
+        serial += 1
+        post_id = datagen.skewed_index(rng, dataset['posts']) + 1
+        roll = rng.random()
+        if roll < passthrough_share:
+            path = '/api/tags?limit=20'
+        elif roll < 0.35:
+            path = f'/api/posts?page={rng.randint(1, 50)}&per_page=10&excerpt=200'
+        elif roll < 0.5:
+            path = '/api/posts?paginate=cursor&per_page=20&fields=id,title,author,created_at'
+        elif roll < 0.8:
+            path = f'/api/posts/{post_id}'
+        else:
+            path = f'/api/posts/{post_id}/comments?per_page=20'
+        if not cached:
+            path += ('&' if '?' in path else '?') + f'_={serial}'
+        yield path
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns (status, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    length, chunked, keep_alive = 0, False, True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            keep_alive = value != 'close'
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def client(port, paths, deadline, samples):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        if writer is None:
+            reader, writer = await asyncio.open_connection(HOST, port)
+        path = next(paths)
+        started = time.perf_counter()
+        try:
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n'.encode())
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status, keep_alive = 599, False
+        samples.append((time.perf_counter() - started, status))
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def drive(port, concurrency, duration, paths):
+    samples = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, paths, deadline, samples) for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def measure(name, command, port, env, args, dataset):
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    try:
+        wait_until_ready(process, port)
+        results = {}
+        for concurrency in args.concurrency:
+            paths = request_paths(dataset, random.Random(args.seed), args.passthrough_share, args.cached)
+            asyncio.run(drive(port, concurrency, min(args.duration, 2), paths))  # warm up
+            samples, elapsed = asyncio.run(drive(port, concurrency, args.duration, paths))
+            latencies = [latency for latency, status in samples if status < 500]
+            results[str(concurrency)] = dict(
+                summarize(latencies),
+                requests_per_second=round(len(latencies) / elapsed, 1),
+                errors=sum(1 for _, status in samples if status >= 500)
+            )
+            row = results[str(concurrency)]
+            print(f"{name:<6}{concurrency:>12}{row['requests_per_second']:>10}{row['p50_ms']:>9}"
+                  f"{row['p95_ms']:>9}{row['p99_ms']:>9}{row['errors']:>8}")
+        return results
+    finally:
+        process.terminate()
+        process.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    datagen.add_scale_arguments(parser)
+    parser.add_argument('--database', help='reuse a database populated by benchmarks.datagen '
+                                           'with the same scale arguments')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--duration', type=float, default=10, help='seconds per concurrency level')
+    parser.add_argument('--threads', type=int, default=32, help='gunicorn threads for the sync server')
+    parser.add_argument('--passthrough-share', type=float, default=0.1,
+                        help='fraction of requests to routes the async app hands to Flask')
+    parser.add_argument('--cached', action='store_true', help='let the response cache answer repeats')
+    parser.add_argument('--servers', nargs='+', choices=('sync', 'async'), default=['sync', 'async'])
+    parser.add_argument('--output', help='where to write the JSON results')
+    args = parser.parse_args()
+
+    missing = [module for module, server in (('gunicorn', 'sync'), ('uvicorn', 'async'))
+               if server in args.servers and importlib.util.find_spec(module) is None]
+    if missing:
+        raise SystemExit(f"missing servers: {', '.join(missing)} (pip install -r requirements-async.txt gunicorn)")
+
+    tmp = tempfile.mkdtemp(prefix='blog-async-')
+    database = args.database or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    env = dict(os.environ, DATABASE_URL=database, UPLOAD_FOLDER=os.path.join(tmp, 'uploads'),
+               SLOW_QUERY_MS=os.environ.get('SLOW_QUERY_MS', '1000'))
+    scale = datagen.scale_from_args(args)
+    if not args.database:
+        os.environ.update(DATABASE_URL=database, UPLOAD_FOLDER=env['UPLOAD_FOLDER'])
+        import app as blog
+        with blog.app.app_context():
+            print(f"generating {args.scale} dataset ({scale['users']} users, {scale['posts']} posts, "
+                  f"{scale['comments']} comments)", file=sys.stderr)
+            datagen.populate(blog, seed=args.seed, log=lambda msg: print(msg, file=sys.stderr), **scale)
+    # Already migrated; the servers shouldn't race each other to do it
+    env['AUTO_MIGRATE'] = '0'
+
+    print(f"{'server':<6}{'concurrency':>12}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}")
+    servers = {}
+    for name in args.servers:
+        port = free_port()
+        servers[name] = measure(name, server_commands(port, args.threads)[name], port, env, args, scale)
+
+    results = {'servers': servers, 'meta': {
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'revision': git_revision(),
+        'scale': args.scale,
+        'dataset': scale,
+        'seed': args.seed,
+        'duration': args.duration,
+        'threads': args.threads,
+        'passthrough_share': args.passthrough_share,
+        'cached': args.cached
+    }}
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        output = os.path.join(RESULTS_DIR, f'async-{args.scale}-{stamp}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f'results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
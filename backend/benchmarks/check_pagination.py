@@ -0,0 +1,72 @@
+"""Check that per_page is clamped on every paginated endpoint.
+
+    cd backend
+    python -m benchmarks.check_pagination
+
+Runs against a throwaway database through the Flask test client. per_page
+values below 1 must give one-row pages, since a zero or negative LIMIT
+would return the whole table. Exits non-zero if any check fails.
+"""
+import os
+import sys
+import tempfile
+
+FAILURES = []
+ROWS = 12
+
+
+def check(name, condition, detail=''):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}{f' ({detail})' if detail and not condition else ''}")
+    if not condition:
+        FAILURES.append(name)
+
+
+def check_clamped(client, name, url, key):
+    for per_page in (0, -5):
+        r = client.get(f'{url}per_page={per_page}')
+        rows = r.get_json()[key] if r.status_code == 200 else None
+        check(f'{name} per_page={per_page} returns one row', rows is not None and len(rows) == 1,
+              f'{r.status_code}, {len(rows) if rows is not None else "no"} rows')
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix='blog-pagination-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'check.db')}"
+    os.environ['UPLOAD_FOLDER'] = os.path.join(tmp, 'uploads')
+
+    import app as blog
+    with blog.app.app_context():
+        blog.prepare_database()
+
+    client = blog.app.test_client()
+    token = client.post('/api/register', json={
+        'username': 'checker', 'email': 'checker@example.com', 'password': 'secret'
+    }).get_json()['token']
+    auth = {'Authorization': f'Bearer {token}'}
+    for i in range(ROWS):
+        client.post('/api/posts', json={'title': f'Post {i}', 'content': 'pagination check'}, headers=auth)
+        client.post('/api/posts/1/comments', json={'content': f'Comment {i}'}, headers=auth)
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+
+    check_clamped(client, 'posts', '/api/posts?', 'posts')
+    check_clamped(client, 'posts (cursor)', '/api/posts?paginate=cursor&', 'posts')
+    check_clamped(client, 'admin posts (cursor)', '/api/admin/posts?paginate=cursor&', 'posts')
+    check_clamped(client, 'admin comments (cursor)', '/api/admin/comments?paginate=cursor&', 'comments')
+
+    check_clamped(client, 'post comments', '/api/posts/1/comments?', 'comments')
+    with blog.app.app_context():
+        searchable = blog.search_available()
+    if searchable:
+        check_clamped(client, 'search', '/api/search?q=pagination&', 'results')
+
+    for url in ('/api/posts?paginate=cursor&per_page=0', '/api/posts/1/comments?per_page=0'):
+        data = client.get(url).get_json()
+        check(f'{url} can continue', data['next_cursor'] is not None)
+
+    print(f'{len(FAILURES)} failed')
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == '__main__':
+    main()
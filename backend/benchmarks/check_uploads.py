@@ -0,0 +1,124 @@
+"""Check caching headers, conditional requests and byte ranges on /uploads,
+and that collecting unused uploads keeps variants another copy still uses.
+
+    cd backend
+    python -m benchmarks.check_uploads
+
+Runs against a throwaway database and upload folder through the Flask test
+client, in both direct and X-Accel-Redirect modes. Exits non-zero if any
+check fails.
+"""
+import io
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+FAILURES = []
+
+
+def check(name, condition, detail=''):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}{f' ({detail})' if detail and not condition else ''}")
+    if not condition:
+        FAILURES.append(name)
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix='blog-uploads-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'check.db')}"
+    os.environ['UPLOAD_FOLDER'] = os.path.join(tmp, 'uploads')
+
+    import app as blog
+    with blog.app.app_context():
+        blog.prepare_database()
+
+    client = blog.app.test_client()
+    token = client.post('/api/register', json={
+        'username': 'checker', 'email': 'checker@example.com', 'password': 'secret'
+    }).get_json()['token']
+    body = bytes(range(256)) * 64
+    uploaded = client.post('/api/upload', data={'file': (io.BytesIO(body), 'data.bin')},
+                           headers={'Authorization': f'Bearer {token}'},
+                           content_type='multipart/form-data').get_json()
+    url, digest = uploaded['url'], uploaded['sha256']
+
+    r = client.get(url)
+    cache_control = r.headers.get('Cache-Control', '')
+    check('full response is 200', r.status_code == 200, r.status_code)
+    check('body matches upload', r.data == body)
+    check('Cache-Control is immutable', 'immutable' in cache_control, cache_control)
+    check('Cache-Control max-age is one year', 'max-age=31536000' in cache_control, cache_control)
+    check('strong ETag is the content hash', r.headers.get('ETag') == f'"{digest}"', r.headers.get('ETag'))
+    check('Accept-Ranges advertised', r.headers.get('Accept-Ranges') == 'bytes')
+
+    r = client.get(url, headers={'If-None-Match': f'"{digest}"'})
+    check('If-None-Match revalidates with 304', r.status_code == 304 and not r.data, r.status_code)
+
+    r = client.get(url, headers={'Range': 'bytes=100-199'})
+    check('byte range returns 206', r.status_code == 206, r.status_code)
+    check('byte range body', r.data == body[100:200])
+    check('Content-Range header', r.headers.get('Content-Range') == f'bytes 100-199/{len(body)}',
+          r.headers.get('Content-Range'))
+
+    r = client.get(url, headers={'Range': 'bytes=-16'})
+    check('suffix range', r.status_code == 206 and r.data == body[-16:], r.status_code)
+
+    r = client.get(url, headers={'Range': f'bytes={len(body) + 10}-'})
+    check('unsatisfiable range returns 416', r.status_code == 416, r.status_code)
+
+    r = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': f'"{digest}"'})
+    check('If-Range with current ETag honours range', r.status_code == 206, r.status_code)
+
+    r = client.get('/uploads/' + '0' * 64 + '.bin')
+    check('missing upload returns 404', r.status_code == 404, r.status_code)
+
+    blog.app.config['UPLOADS_SERVE_MODE'] = 'x-accel'
+    r = client.get(url)
+    accel = r.headers.get('X-Accel-Redirect')
+    check('X-Accel-Redirect points at internal location',
+          accel == blog.app.config['UPLOADS_ACCEL_PREFIX'] + uploaded['filename'], accel)
+    check('X-Accel-Redirect response has no body', not r.data)
+    check('X-Accel-Redirect keeps cache headers', 'immutable' in r.headers.get('Cache-Control', ''))
+    blog.app.config['UPLOADS_SERVE_MODE'] = 'direct'
+
+    if blog.derivatives.available:
+        check_shared_variants(blog, client, token)
+
+    print(f'{len(FAILURES)} failed')
+    sys.exit(1 if FAILURES else 0)
+
+
+def check_shared_variants(blog, client, token):
+    from PIL import Image
+
+    # The same bytes under two extensions are two uploads sharing one digest,
+    # and so one set of variants
+    image = io.BytesIO()
+    Image.new('RGB', (1000, 600), 'teal').save(image, 'PNG')
+    headers = {'Authorization': f'Bearer {token}'}
+    png, jpg = (client.post('/api/upload', data={'file': (io.BytesIO(image.getvalue()), name)},
+                            headers=headers, content_type='multipart/form-data').get_json()
+                for name in ('photo.png', 'photo.jpg'))
+    digest = png['sha256']
+    for width in blog.derivatives.widths:
+        blog.derivatives.ensure(blog.upload_store.path(png['filename']), digest, width)
+    post_id = client.post('/api/posts', json={'title': 'Photo', 'content': 'x', 'image_url': jpg['url']},
+                          headers=headers).get_json()['post']['id']
+
+    with blog.app.app_context():
+        collected = blog.collect_unused_uploads(grace=timedelta(0))
+    variants = blog.derivatives.variant_urls(digest, blog.UPLOAD_URL_PREFIX)
+    check('unused copy is collected', png['filename'] in collected, collected)
+    check('variants survive while another copy is used',
+          len(variants) == len(blog.derivatives.widths), variants)
+
+    client.delete(f'/api/posts/{post_id}', headers=headers)
+    with blog.app.app_context():
+        collected = blog.collect_unused_uploads(grace=timedelta(0))
+    variants = blog.derivatives.variant_urls(digest, blog.UPLOAD_URL_PREFIX)
+    check('last copy is collected', jpg['filename'] in collected, collected)
+    check('variants go with the last copy', not variants, variants)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Populate a database with deterministic synthetic users, posts, tags and comments.
+
+    cd backend
+    python -m benchmarks.datagen --scale small --database sqlite:////tmp/bench.db
+
+The same ``--seed`` and scale always produce the same rows. Rows are written
+with chunked executemany inserts, bypassing the ORM; the denormalized
+counters, rollups and search index are then rebuilt from the base tables the
+same way the maintenance commands do. Every user's password is
+``benchmark``.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# users, posts, comments, tags
+SCALES = {
+    'tiny': (50, 500, 2000, 40),
+    'small': (1000, 20000, 100000, 200),
+    'medium': (5000, 100000, 500000, 500),
+    'large': (10000, 200000, 2000000, 1000)
+}
+PASSWORD = 'benchmark'
+CHUNK_SIZE = 5000
+# Posts span this many days back from the fixed epoch below
+HISTORY_DAYS = 365
+EPOCH = datetime(2024, 1, 1)
+
+WORDS = (
+    'performance cache index query latency python flask database request '
+    'response server client session token memory thread worker queue batch '
+    'stream upload image feed search tag comment post author admin deploy '
+    'release metric profile benchmark design pattern module package schema '
+    'migration replica pool lock commit rollback async event signal buffer'
+).split()
+
+
+def sentence(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def paragraphs(rng, count):
+    return '\n\n'.join(sentence(rng, 40, 120).capitalize() + '.' for _ in range(count))
+
+
+def skewed_index(rng, count, skew=3):
+    """An index in [0, count) biased towards the end (the newest rows)."""
+    return count - 1 - int(count * rng.random() ** skew)
+
+
+def chunked_insert(blog, table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        blog.db.session.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+
+
+def populate(blog, users, posts, comments, tags, seed=0, log=print):
+    """Migrate an empty database and insert the synthetic dataset; returns row counts."""
+    blog.upgrade_database()
+    rng = random.Random(seed)
+    session = blog.db.session
+    password_hash = blog.password_hasher.hash(PASSWORD)
+    started = time.perf_counter()
+
+    session.execute(blog.Tag.__table__.insert(),
+                    [{'id': i + 1, 'name': f'{rng.choice(WORDS)}-{i}'} for i in range(tags)])
+
+    user_rows = []
+    for i in range(users):
+        user_rows.append({
+            'id': i + 1,
+            'username': f'user{i}',
+            'email': f'user{i}@example.com',
+            'password_hash': password_hash,
+            'created_at': EPOCH - timedelta(days=HISTORY_DAYS, minutes=users - i)
+        })
+    chunked_insert(blog, blog.User.__table__, user_rows)
+    log(f'users: {users}')
+
+    # Ids follow creation order so "newest" is the highest id, like real data
+    step = timedelta(days=HISTORY_DAYS) / max(posts, 1)
+    post_rows, post_created, tag_rows = [], [], []
+    for i in range(posts):
+        created_at = EPOCH - timedelta(days=HISTORY_DAYS) + step * i
+        post_created.append(created_at)
+        post_rows.append({
+            'id': i + 1,
+            'title': sentence(rng, 3, 9).title(),
+            'content': paragraphs(rng, rng.randint(1, 6)),
+            'author_id': skewed_index(rng, users, skew=2) + 1,
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+        # Popular tags are far more common than the long tail
+        for tag_id in {int(tags * rng.random() ** 3) + 1 for _ in range(rng.randint(1, 4))}:
+            tag_rows.append({'post_id': i + 1, 'tag_id': tag_id})
+        if len(post_rows) == CHUNK_SIZE:
+            chunked_insert(blog, blog.Post.__table__, post_rows)
+            post_rows = []
+    chunked_insert(blog, blog.Post.__table__, post_rows)
+    chunked_insert(blog, blog.post_tags, tag_rows)
+    log(f'posts: {posts} ({len(tag_rows)} tag links)')
+
+    comment_rows = []
+    for i in range(comments):
+        post_index = skewed_index(rng, posts)
+        created_at = min(post_created[post_index] + timedelta(minutes=rng.randint(1, 7 * 24 * 60)), EPOCH)
+        comment_rows.append({
+            'id': i + 1,
+            'content': sentence(rng, 5, 40).capitalize() + '.',
+            'author_id': rng.randrange(users) + 1,
+            'post_id': post_index + 1,
+            'created_at': created_at
+        })
+        if len(comment_rows) == CHUNK_SIZE:
+            chunked_insert(blog, blog.Comment.__table__, comment_rows)
+            comment_rows = []
+    chunked_insert(blog, blog.Comment.__table__, comment_rows)
+    session.commit()
+    log(f'comments: {comments}')
+
+    blog.backfill_counters()
+    blog.rebuild_rollups()
+    if blog.search_available():
+        blog.rebuild_search_index()
+    log(f'derived data rebuilt, {time.perf_counter() - started:.1f}s total')
+    return {'users': users, 'posts': posts, 'comments': comments, 'tags': tags,
+            'post_tags': len(tag_rows)}
+
+
+def add_scale_arguments(parser):
+    parser.add_argument('--scale', choices=SCALES, default='tiny')
+    parser.add_argument('--users', type=int, help='override the scale preset')
+    parser.add_argument('--posts', type=int)
+    parser.add_argument('--comments', type=int)
+    parser.add_argument('--tags', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def scale_from_args(args):
+    users, posts, comments, tags = SCALES[args.scale]
+    return {
+        'users': args.users or users,
+        'posts': args.posts or posts,
+        'comments': args.comments if args.comments is not None else comments,
+        'tags': args.tags or tags
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument('--database', help='SQLAlchemy URL of an empty database '
+                                           '(default: a new SQLite file in a temp dir)')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='blog-data-')
+    database = args.database or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['DATABASE_URL'] = database
+    os.environ.setdefault('UPLOAD_FOLDER', os.path.join(tmp, 'uploads'))
+
+    import app as blog
+    with blog.app.app_context():
+        if blog.db.session.query(blog.User.id).first() is not None:
+            raise SystemExit(f'{database} already has users; point --database at an empty database')
+        populate(blog, seed=args.seed, **scale_from_args(args))
+    print(database)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,495 @@
+"""Replay a realistic request mix against every route and record latency.
+
+    cd backend
+    python -m benchmarks.load --scale small --requests 5000 --concurrency 4
+    python -m benchmarks.load --scale small --compare benchmarks/results/<previous>.json
+
+A fresh database is generated with benchmarks.datagen (or reused with
+--database), then worker threads drive the app in-process through the Flask
+test client, so the numbers exclude network and server overhead. The
+operation sequence comes from --seed, so two runs on the same build issue
+the same requests.
+
+For each operation the report has p50/p95/p99 latency, SQL queries and SQL
+time per request (read from the Server-Timing header), response bytes and
+status counts. It also has overall throughput and peak RSS. Results are written as JSON under
+benchmarks/results/ (or to --output). --compare reports p95 and
+query-count regressions against an earlier result and exits non-zero if
+there are any. --accept-encoding sends that Accept-Encoding header with
+every request, to measure compressed responses.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote_plus
+
+from benchmarks import datagen
+from benchmarks.stats import summarize
+from compress import decompress
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+# A 1x1 PNG, so uploads exercise the image variant path when Pillow is installed
+PNG_BYTES = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000d49444154789c6360f8cfc0f01f0005000201a5f3c5b80000000049454e44ae426082'
+)
+
+
+class Worker:
+    """One simulated client: a test client plus the state its operations need."""
+
+    def __init__(self, blog, dataset, rng, accept_encoding=None):
+        self.blog = blog
+        self.dataset = dataset
+        self.rng = rng
+        self.client = blog.app.test_client()
+        if accept_encoding:
+            self.client.environ_base['HTTP_ACCEPT_ENCODING'] = accept_encoding
+        self.user_id = rng.randrange(dataset['users']) + 1
+        with blog.app.app_context():
+            self.token = blog.generate_token(self.user_id)
+        with self.client.session_transaction() as session:
+            session['admin_logged_in'] = True
+        self.username = f'user{self.user_id - 1}'
+        self.started = datetime.utcnow()
+        self.own_posts = []
+        self.uploads = []
+        self.cursor = None
+        self.serial = 0
+
+    @property
+    def auth(self):
+        return {'Authorization': f'Bearer {self.token}'}
+
+    def any_post(self):
+        return datagen.skewed_index(self.rng, self.dataset['posts']) + 1
+
+    def any_tag(self):
+        return self.dataset['tag_names'][int(len(self.dataset['tag_names']) * self.rng.random() ** 3)]
+
+    def unique(self, prefix):
+        self.serial += 1
+        return f'{prefix}-{threading.get_ident()}-{self.serial}'
+
+
+# Each operation returns (method, path, request kwargs), or None to skip
+def op_landing(w):
+    return 'GET', '/', {}
+
+def op_admin_login_page(w):
+    return 'GET', '/admin/login', {}
+
+def op_admin_logout(w):
+    # On a separate client so this worker keeps its admin session
+    return 'GET', '/admin/logout', {'client': w.blog.app.test_client()}
+
+def op_list_posts(w):
+    return 'GET', f'/api/posts?page={1 + int(5 * w.rng.random() ** 2)}', {}
+
+def op_list_posts_deep(w):
+    return 'GET', f'/api/posts?page={w.rng.randint(50, 200)}', {}
+
+def op_list_posts_cursor(w):
+    if w.cursor and w.rng.random() < 0.8:
+        return 'GET', f'/api/posts?cursor={w.cursor}', {'follow_cursor': True}
+    return 'GET', '/api/posts?paginate=cursor', {'follow_cursor': True}
+
+def op_tag_listing(w):
+    return 'GET', f'/api/posts?tag={w.any_tag()}', {}
+
+def op_post_detail(w):
+    return 'GET', f'/api/posts/{w.any_post()}', {}
+
+def op_comment_page(w):
+    return 'GET', f'/api/posts/{w.any_post()}/comments?per_page=20', {}
+
+def op_tags(w):
+    return 'GET', '/api/tags', {}
+
+def op_trending_tags(w):
+    return 'GET', f'/api/tags/trending?limit={w.rng.choice([10, 25])}', {}
+
+def op_rss(w):
+    return 'GET', '/api/rss', {}
+
+def op_rss_tag(w):
+    return 'GET', f'/api/rss?tag={w.any_tag()}', {}
+
+def op_search(w):
+    words = ' '.join(w.rng.sample(datagen.WORDS, w.rng.randint(1, 2)))
+    return 'GET', f'/api/search?q={quote_plus(words)}', {}
+
+def op_current_user(w):
+    return 'GET', '/api/user', {'headers': w.auth}
+
+def op_dashboard(w):
+    return 'GET', '/api/dashboard', {'headers': w.auth}
+
+def op_create_comment(w):
+    return 'POST', f'/api/posts/{w.any_post()}/comments', {
+        'headers': w.auth, 'json': {'content': datagen.sentence(w.rng, 5, 30)}}
+
+def op_create_post(w):
+    return 'POST', '/api/posts', {'headers': w.auth, 'json': {
+        'title': datagen.sentence(w.rng, 3, 8).title(),
+        'content': datagen.paragraphs(w.rng, w.rng.randint(1, 4)),
+        'tags': [w.any_tag() for _ in range(w.rng.randint(0, 3))],
+        'image_url': w.uploads[-1] if w.uploads and w.rng.random() < 0.3 else None
+    }, 'remember_post': True}
+
+def op_update_post(w):
+    if not w.own_posts:
+        return None
+    return 'PUT', f'/api/posts/{w.rng.choice(w.own_posts)}', {'headers': w.auth, 'json': {
+        'title': datagen.sentence(w.rng, 3, 8).title(),
+        'content': datagen.paragraphs(w.rng, 2),
+        'tags': [w.any_tag()]
+    }}
+
+def op_delete_post(w):
+    if not w.own_posts:
+        return None
+    return 'DELETE', f'/api/posts/{w.own_posts.pop()}', {'headers': w.auth}
+
+def op_upload(w):
+    # Unique bytes each time so the store doesn't just deduplicate
+    body = PNG_BYTES + w.unique('upload').encode()
+    return 'POST', '/api/upload?filename=image.png', {
+        'headers': dict(w.auth, **{'Content-Type': 'image/png'}), 'data': body,
+        'remember_upload': True}
+
+def op_serve_upload(w):
+    if not w.uploads:
+        return None
+    return 'GET', w.uploads[-1], {}
+
+def op_serve_variant(w):
+    if not w.uploads or not w.blog.derivatives.available:
+        return None
+    # Any configured width: recent uploads exercise on-demand generation
+    filename = w.uploads[-1].rsplit('/', 1)[1]
+    derivatives = w.blog.derivatives
+    name = derivatives.variant_name(filename[:64], w.rng.choice(derivatives.widths))
+    return 'GET', f'/uploads/variants/{name}', {}
+
+def op_login(w):
+    return 'POST', '/api/login', {'json': {
+        'username': f'user{w.rng.randrange(w.dataset["users"])}', 'password': datagen.PASSWORD}}
+
+def op_register(w):
+    name = w.unique('load')
+    return 'POST', '/api/register', {'json': {
+        'username': name, 'email': f'{name}@example.com', 'password': datagen.PASSWORD}}
+
+def op_logout(w):
+    with w.blog.app.app_context():
+        token = w.blog.generate_token(w.user_id)
+    return 'POST', '/api/logout', {'headers': {'Authorization': f'Bearer {token}'}}
+
+def op_admin_users(w):
+    return 'GET', f'/api/admin/users?page={w.rng.randint(1, 5)}', {}
+
+def op_admin_posts(w):
+    return 'GET', f'/api/admin/posts?page={w.rng.randint(1, 5)}', {}
+
+def op_admin_comments(w):
+    return 'GET', f'/api/admin/comments?page={w.rng.randint(1, 5)}', {}
+
+def op_admin_stats(w):
+    return 'GET', f"/api/admin/stats?window={w.rng.choice(['24h', '7d', '30d'])}", {}
+
+def op_admin_cache(w):
+    return 'GET', '/api/admin/cache', {}
+
+def op_admin_metrics(w):
+    return 'GET', '/api/admin/metrics', {}
+
+def op_admin_tag_index(w):
+    return 'GET', '/api/admin/tag-index', {}
+
+def op_admin_rebuild_tag_index(w):
+    return 'POST', '/api/admin/tag-index', {}
+
+def op_admin_bulk_delete_posts(w):
+    # Moderates posts this worker created, so the dataset itself stays intact
+    if not w.own_posts:
+        return None
+    ids = [w.own_posts.pop() for _ in range(min(len(w.own_posts), w.rng.randint(1, 3)))]
+    return 'POST', '/api/admin/posts/bulk-delete', {'json': {'ids': ids}}
+
+def op_admin_bulk_delete_comments(w):
+    # This worker's user's comments since the run started; a dry run scans
+    # the user's whole history instead
+    if w.rng.random() < 0.5:
+        filters = {'author': w.username, 'dry_run': True}
+    else:
+        filters = {'author': w.username, 'since': w.started.isoformat()}
+    return 'POST', '/api/admin/comments/bulk-delete', {'json': filters}
+
+def op_admin_import(w):
+    record = {'title': datagen.sentence(w.rng, 3, 8), 'content': datagen.paragraphs(w.rng, 2),
+              'author': f'user{w.rng.randrange(w.dataset["users"])}', 'tags': [w.any_tag()],
+              'comments': [{'author': 'user0', 'content': datagen.sentence(w.rng, 5, 20)}]}
+    return 'POST', '/api/admin/import', {'data': json.dumps(record) + '\n',
+                                         'content_type': 'application/x-ndjson'}
+
+
+# Relative weights: mostly anonymous reads, a steady trickle of writes, and
+# occasional admin and auth traffic
+MIX = [
+    (op_post_detail, 25),
+    (op_list_posts, 22),
+    (op_tag_listing, 8),
+    (op_list_posts_cursor, 5),
+    (op_search, 5),
+    (op_create_comment, 5),
+    (op_tags, 4),
+    (op_trending_tags, 2),
+    (op_comment_page, 3),
+    (op_list_posts_deep, 3),
+    (op_rss, 3),
+    (op_current_user, 3),
+    (op_dashboard, 3),
+    (op_create_post, 2),
+    (op_serve_upload, 2),
+    (op_rss_tag, 1),
+    (op_update_post, 1),
+    (op_upload, 1),
+    (op_login, 1),
+    (op_landing, 1),
+    (op_admin_posts, 1),
+    (op_admin_comments, 1),
+    (op_admin_users, 0.5),
+    (op_admin_stats, 0.5),
+    (op_delete_post, 0.5),
+    (op_serve_variant, 0.5),
+    (op_register, 0.3),
+    (op_logout, 0.3),
+    (op_admin_cache, 0.2),
+    (op_admin_metrics, 0.2),
+    (op_admin_tag_index, 0.2),
+    (op_admin_bulk_delete_posts, 0.2),
+    (op_admin_bulk_delete_comments, 0.2),
+    (op_admin_import, 0.2),
+    (op_admin_login_page, 0.2),
+    (op_admin_logout, 0.1),
+    (op_admin_rebuild_tag_index, 0.05),
+]
+
+
+def op_name(op):
+    return op.__name__[len('op_'):]
+
+
+def run_worker(worker, ops, samples):
+    for op in ops:
+        spec = op(worker)
+        if spec is None:
+            continue
+        method, path, kwargs = spec
+        client = kwargs.pop('client', worker.client)
+        follow_cursor = kwargs.pop('follow_cursor', False)
+        remember_post = kwargs.pop('remember_post', False)
+        remember_upload = kwargs.pop('remember_upload', False)
+
+        started = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        body = response.get_data()
+        elapsed = time.perf_counter() - started
+
+        match = SERVER_TIMING_DB.search(response.headers.get('Server-Timing', ''))
+        queries, db_ms = (int(match[2]), float(match[1])) if match else (0, 0.0)
+        samples.append((op_name(op), elapsed, response.status_code, queries, db_ms, len(body)))
+
+        if response.is_json and response.status_code < 300:
+            encoding = response.headers.get('Content-Encoding')
+            data = json.loads(decompress(body, encoding) if encoding else body)
+            if follow_cursor:
+                worker.cursor = data.get('next_cursor')
+            if remember_post:
+                worker.own_posts.append(data['post']['id'])
+            if remember_upload:
+                worker.uploads.append(data['url'])
+
+
+def report(samples, elapsed):
+    by_op = {}
+    for name, latency, status, queries, db_ms, size in samples:
+        by_op.setdefault(name, []).append((latency, status, queries, db_ms, size))
+    operations = {}
+    for name, rows in sorted(by_op.items()):
+        statuses = {}
+        for _, status, _, _, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        operations[name] = dict(
+            summarize([row[0] for row in rows]),
+            queries_per_request=round(sum(row[2] for row in rows) / len(rows), 2),
+            db_ms_per_request=round(sum(row[3] for row in rows) / len(rows), 2),
+            bytes_per_request=round(sum(row[4] for row in rows) / len(rows)),
+            statuses=statuses
+        )
+    return {
+        'overall': dict(summarize([row[1] for row in samples]),
+                        queries_per_request=round(sum(row[3] for row in samples) / len(samples), 2),
+                        bytes_per_request=round(sum(row[5] for row in samples) / len(samples)),
+                        requests_per_second=round(len(samples) / elapsed, 1),
+                        errors=sum(1 for row in samples if row[2] >= 500)),
+        'operations': operations
+    }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous, threshold):
+    """Return human-readable regressions of ``current`` against ``previous``."""
+    regressions = []
+    for name, now in current['operations'].items():
+        before = previous.get('operations', {}).get(name)
+        if not before:
+            continue
+        if now['queries_per_request'] > before['queries_per_request'] + 0.5:
+            regressions.append(f"{name}: queries/request {before['queries_per_request']} -> "
+                               f"{now['queries_per_request']}")
+        # Ignore sub-millisecond changes, which are noise at this resolution
+        if (now['p95_ms'] > before['p95_ms'] * (1 + threshold)
+                and now['p95_ms'] - before['p95_ms'] > 1.0):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    datagen.add_scale_arguments(parser)
+    parser.add_argument('--database', help='reuse a database populated by benchmarks.datagen '
+                                           'with the same scale arguments')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200, help='requests excluded from the results')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--hash-method', default=None,
+                        help='PASSWORD_HASH_METHOD for the run (default: the app default)')
+    parser.add_argument('--accept-encoding', help="Accept-Encoding header to send (e.g. 'gzip')")
+    parser.add_argument('--output', help='where to write the JSON results')
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative p95 increase before --compare fails')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='blog-load-')
+    os.environ['DATABASE_URL'] = args.database or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['UPLOAD_FOLDER'] = os.path.join(tmp, 'uploads')
+    if args.hash_method:
+        os.environ['PASSWORD_HASH_METHOD'] = args.hash_method
+    os.environ.setdefault('SLOW_QUERY_MS', '1000')
+
+    import app as blog
+
+    scale = datagen.scale_from_args(args)
+    with blog.app.app_context():
+        if not args.database:
+            print(f"generating {args.scale} dataset ({scale['users']} users, {scale['posts']} posts, "
+                  f"{scale['comments']} comments)", file=sys.stderr)
+            datagen.populate(blog, seed=args.seed, log=lambda msg: print(msg, file=sys.stderr), **scale)
+        tag_names = [name for (name,) in blog.db.session.query(blog.Tag.name).order_by(blog.Tag.id)]
+        dialect = blog.db.engine.dialect.name
+    dataset = dict(scale, tag_names=tag_names)
+
+    rng = random.Random(args.seed)
+    ops, weights = zip(*MIX)
+    workers = [Worker(blog, dataset, random.Random(rng.random()), args.accept_encoding)
+               for _ in range(args.concurrency)]
+    plans = [[] for _ in workers]
+    for i, op in enumerate(rng.choices(ops, weights, k=args.warmup + args.requests)):
+        plans[i % len(workers)].append(op)
+
+    warmup = args.warmup // len(workers)
+    run_threads(workers, [plan[:warmup] for plan in plans], [[] for _ in workers])
+    blog.request_metrics.reset()
+
+    per_worker = [[] for _ in workers]
+    started = time.perf_counter()
+    run_threads(workers, [plan[warmup:] for plan in plans], per_worker)
+    elapsed = time.perf_counter() - started
+    samples = [sample for worker_samples in per_worker for sample in worker_samples]
+
+    results = dict(report(samples, elapsed), meta={
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'database': dialect,
+        'scale': args.scale,
+        'dataset': scale,
+        'seed': args.seed,
+        'requests': len(samples),
+        'concurrency': args.concurrency,
+        'accept_encoding': args.accept_encoding,
+        'seconds': round(elapsed, 2),
+        'peak_rss_mb': peak_rss_mb()
+    })
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        output = os.path.join(RESULTS_DIR, f'load-{args.scale}-{stamp}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    print(f"{'operation':<28}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'bytes':>9}")
+    for name, row in sorted(results['operations'].items(), key=lambda item: -item[1]['count']):
+        print(f"{name:<28}{row['count']:>7}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+              f"{row['queries_per_request']:>9}{row['bytes_per_request']:>9}")
+    overall = results['overall']
+    print(f"overall: p50={overall['p50_ms']}ms p95={overall['p95_ms']}ms p99={overall['p99_ms']}ms "
+          f"{overall['requests_per_second']} req/s, peak RSS {results['meta']['peak_rss_mb']}MB")
+    print(f'results written to {output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            raise SystemExit(1)
+
+
+def run_threads(workers, plans, samples):
+    threads = [threading.Thread(target=run_worker, args=(worker, plan, out))
+               for worker, plan, out in zip(workers, plans, samples)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+if __name__ == '__main__':
+    main()
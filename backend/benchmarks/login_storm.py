@@ -0,0 +1,124 @@
+"""Measure read latency while a burst of logins is hashing passwords.
+
+    cd backend
+    python -m benchmarks.login_storm --logins 200 --concurrency 32
+
+The app runs on a local threaded WSGI server against a throwaway SQLite
+database. /api/posts latency is sampled at rest and during a login storm,
+first with hashing inline on the request threads and then on the bounded
+PasswordHasher pool.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stats import summarize
+
+
+def request(url, data=None):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def sample_reads(base_url, stop, samples):
+    i = 0
+    while not stop.is_set():
+        i += 1
+        started = time.perf_counter()
+        # A unique query string bypasses the response cache
+        request(f'{base_url}/api/posts?per_page=10&n={i}')
+        samples.append(time.perf_counter() - started)
+
+
+def run_storm(base_url, logins, concurrency, password):
+    stop = threading.Event()
+    reads = []
+    reader = threading.Thread(target=sample_reads, args=(base_url, stop, reads))
+    reader.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        statuses = list(pool.map(
+            lambda _: request(f'{base_url}/api/login', {'username': 'storm', 'password': password}),
+            range(logins)
+        ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    reader.join()
+    return reads, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=2, help='hashing pool size')
+    parser.add_argument('--max-pending', type=int, default=32)
+    parser.add_argument('--method', default='pbkdf2:sha256:600000')
+    parser.add_argument('--baseline-seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='blog-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['PASSWORD_HASH_METHOD'] = args.method
+
+    import app as blog
+    from passwords import PasswordHasher
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    with blog.app.app_context():
+        blog.prepare_database()
+
+    password = 'correct horse battery staple'
+    client = blog.app.test_client()
+    token = client.post('/api/register', json={
+        'username': 'storm', 'email': 'storm@example.com', 'password': password
+    }).get_json()['token']
+    for i in range(30):
+        client.post('/api/posts', json={'title': f'Post {i}', 'content': 'x' * 2000, 'tags': ['bench']},
+                    headers={'Authorization': f'Bearer {token}'})
+
+    server = make_server('127.0.0.1', 0, blog.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    stop = threading.Event()
+    baseline = []
+    reader = threading.Thread(target=sample_reads, args=(base_url, stop, baseline))
+    reader.start()
+    time.sleep(args.baseline_seconds)
+    stop.set()
+    reader.join()
+
+    results = {'baseline_reads': summarize(baseline)}
+    for mode, workers in (('inline', 0), ('pool', args.workers)):
+        blog.password_hasher = PasswordHasher(args.method, workers=workers, max_pending=args.max_pending)
+        reads, statuses, elapsed = run_storm(base_url, args.logins, args.concurrency, password)
+        results[mode] = {
+            'reads_during_storm': summarize(reads),
+            'logins': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+            'storm_seconds': round(elapsed, 2)
+        }
+        blog.password_hasher.shutdown()
+
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Time the cleanup of a comment spam wave with the bulk moderation API.
+
+    cd backend
+    python -m benchmarks.spam_cleanup --scale tiny --spam 100000
+
+A spammer account posts --spam comments across the generated dataset's
+posts, and they are deleted with bulk_delete (the code behind
+POST /api/admin/comments/bulk-delete). With --baseline the same wave is
+posted again and deleted through the ORM, one session.delete per comment,
+which is what removing rows through the models costs. Counters and rollups
+are checked against the base tables after each cleanup.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from benchmarks import datagen
+
+SPAMMER = 'spammer'
+
+
+def post_spam(blog, count, seed):
+    """Insert ``count`` spam comments and their counter/rollup deltas; returns the spammer's id."""
+    rng = random.Random(seed)
+    session = blog.db.session
+    spammer = session.execute(blog.db.select(blog.User.id).where(blog.User.username == SPAMMER)).scalar()
+    if spammer is None:
+        spammer = session.execute(blog.User.__table__.insert().values(
+            username=SPAMMER, email=f'{SPAMMER}@example.com',
+            password_hash=blog.password_hasher.hash(datagen.PASSWORD),
+            created_at=datagen.EPOCH
+        )).inserted_primary_key[0]
+    posts = session.execute(blog.db.select(blog.Post.id)).scalars().all()
+    rows = [{
+        'content': f'Cheap pills at example.com/{i} ' + datagen.sentence(rng, 5, 20),
+        'author_id': spammer,
+        'post_id': posts[datagen.skewed_index(rng, len(posts))],
+        'created_at': datagen.EPOCH + timedelta(seconds=i)
+    } for i in range(count)]
+    datagen.chunked_insert(blog, blog.Comment.__table__, rows)
+    session.commit()
+    blog.backfill_counters()
+    blog.rebuild_rollups()
+    return spammer
+
+
+def orm_cleanup(blog, spammer):
+    session = blog.db.session
+    for comment in blog.Comment.query.filter_by(author_id=spammer).all():
+        session.delete(comment)
+    session.commit()
+
+
+def check(blog):
+    mismatches = blog.verify_counters()
+    stored = {row.name: row.value for row in blog.StatCounter.query.all()}
+    expected = blog.rebuild_rollups()
+    if mismatches or stored != expected:
+        raise SystemExit(f'derived data drifted: counters {mismatches}, rollups {stored} != {expected}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    datagen.add_scale_arguments(parser)
+    parser.add_argument('--spam', type=int, default=100000, help='spam comments to post')
+    parser.add_argument('--batch-size', type=int, help='bulk delete batch size')
+    parser.add_argument('--baseline', action='store_true', help='also time an ORM row-by-row cleanup')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='blog-spam-')
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                      UPLOAD_FOLDER=os.path.join(tmp, 'uploads'))
+    import app as blog
+    with blog.app.app_context():
+        datagen.populate(blog, seed=args.seed, log=lambda msg: print(msg, file=sys.stderr),
+                         **datagen.scale_from_args(args))
+
+        spammer = post_spam(blog, args.spam, args.seed)
+        started = time.perf_counter()
+        summary = blog.bulk_delete(blog.Comment, {'author': SPAMMER},
+                                   batch_size=args.batch_size or blog.MODERATION_BATCH_SIZE)
+        elapsed = time.perf_counter() - started
+        check(blog)
+        print(f"bulk delete: {summary['comments']} comments in {summary['batches']} batches, "
+              f"{elapsed:.2f}s ({summary['comments'] / elapsed:.0f} rows/s)")
+
+        if args.baseline:
+            post_spam(blog, args.spam, args.seed)
+            started = time.perf_counter()
+            orm_cleanup(blog, spammer)
+            elapsed = time.perf_counter() - started
+            check(blog)
+            print(f'ORM delete:  {args.spam} comments, {elapsed:.2f}s ({args.spam / elapsed:.0f} rows/s)')
+
+
+if __name__ == '__main__':
+    main()
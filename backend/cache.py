@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class LRUCache:
+    """Thread-safe in-process cache bounded by entry count and TTL."""
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self):
+        return dict(self.stats.as_dict(), backend='local', entries=len(self._data),
+                    max_entries=self.max_entries, ttl=self.ttl)
+
+
+class LocalSharedClient:
+    """In-memory stand-in for the subset of the redis-py API used by SharedCache.
+
+    Lets the shared backend run in development and tests without a server.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key):
+        with self._lock:
+            value, expires_at = self._data.get(key, (b'0', None))
+            value = int(value) + 1
+            self._data[key] = (str(value).encode(), expires_at)
+            return value
+
+
+class SharedCache:
+    """Cache backed by a redis-compatible client shared between workers."""
+
+    def __init__(self, client, prefix='blog:', ttl=60):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, value, ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def info(self):
+        return dict(self.stats.as_dict(), backend='shared', ttl=self.ttl)
+
+
+class ResponseCache:
+    """Caches encoded responses under invalidation namespaces.
+
+    Each namespace has a generation number that is part of every key stored
+    under it; invalidating a namespace bumps the generation, which orphans
+    the old entries (they age out through LRU eviction or TTL) without having
+    to enumerate them. This works the same for local and shared backends.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def _generation(self, namespace):
+        if isinstance(self.backend, SharedCache):
+            value = self.backend.client.get(self.backend.prefix + 'gen:' + namespace)
+            return int(value) if value is not None else 0
+        return self._generations.get(namespace, 0)
+
+    def make_key(self, namespaces, key):
+        """Build the storage key; compute it once per request and reuse it for
+        ``get`` and ``set`` so a concurrent invalidation can't be overwritten
+        with stale data."""
+        stamp = ','.join(f'{ns}@{self._generation(ns)}' for ns in namespaces)
+        return f'resp:{stamp}:{key}'
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            if isinstance(self.backend, SharedCache):
+                self.backend.incr('gen:' + namespace)
+            else:
+                with self._lock:
+                    self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self.backend.stats.invalidations += 1
+
+    def info(self):
+        return self.backend.info()
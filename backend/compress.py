@@ -0,0 +1,107 @@
+import gzip
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd is offered only when installed
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # likewise for brotli
+    brotli = None
+
+# Levels tuned for compressing on the request path rather than for size
+LEVELS = {'zstd': 3, 'br': 5, 'gzip': 6}
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/rss+xml',
+    'application/xml',
+    'application/javascript',
+    'image/svg+xml'
+}
+
+
+def supported_encodings(preferred=('zstd', 'br', 'gzip')):
+    """The encodings from ``preferred`` whose libraries are importable, in order."""
+    available = {'gzip': True, 'zstd': zstandard is not None, 'br': brotli is not None}
+    return tuple(name for name in preferred if available.get(name))
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES)
+
+
+def compress(data, encoding):
+    level = LEVELS[encoding]
+    if encoding == 'gzip':
+        # mtime=0 gives identical bytes for identical input
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    raise ValueError(f'unsupported encoding: {encoding}')
+
+
+def decompress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if encoding == 'br':
+        return brotli.decompress(data)
+    raise ValueError(f'unsupported encoding: {encoding}')
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def finish(self):
+        return self._obj.finish()
+
+
+_STREAMS = {'gzip': _GzipStream, 'zstd': _ZstdStream, 'br': _BrotliStream}
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of byte chunks incrementally.
+
+    Output is yielded whenever the compressor emits a block, so memory stays
+    bounded by the compressor's window rather than the size of the body.
+    """
+    stream = _STREAMS[encoding](LEVELS[encoding])
+    for chunk in chunks:
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
@@ -0,0 +1,92 @@
+import os
+from functools import wraps
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Applied to every new SQLite connection. WAL lets readers proceed while a
+# writer commits, busy_timeout makes writers wait for the lock instead of
+# failing with "database is locked", and the cache/mmap sizes keep hot pages
+# in memory.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,       # milliseconds
+    'cache_size': -20000,       # negative means KiB, so ~20MB per connection
+    'mmap_size': 268435456,     # 256MB
+    'temp_store': 'MEMORY'
+}
+
+READ_BIND = 'read'
+
+
+def engine_options_from_env(environ=os.environ):
+    """Pool settings for SQLALCHEMY_ENGINE_OPTIONS; unset values keep defaults."""
+    options = {}
+    for key, option, cast in (
+        ('DB_POOL_SIZE', 'pool_size', int),
+        ('DB_MAX_OVERFLOW', 'max_overflow', int),
+        ('DB_POOL_TIMEOUT', 'pool_timeout', float),
+        ('DB_POOL_RECYCLE', 'pool_recycle', int)
+    ):
+        if environ.get(key):
+            options[option] = cast(environ[key])
+    if environ.get('DB_POOL_PRE_PING', '').lower() in ('1', 'true', 'yes'):
+        options['pool_pre_ping'] = True
+    return options
+
+
+def sqlite_pragmas_from_env(environ=os.environ):
+    pragmas = dict(SQLITE_PRAGMAS)
+    for name in pragmas:
+        value = environ.get(f'SQLITE_{name.upper()}')
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+def read_pragmas(engine, names):
+    with engine.connect() as connection:
+        return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
+
+
+def use_read_replica():
+    """Route the rest of this request's queries to the read bind, if any."""
+    g.read_only = True
+
+
+def read_only(view):
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        use_read_replica()
+        return view(*args, **kwargs)
+    return decorated
+
+
+class RoutingSession(Session):
+    """Sends reads in read-only requests to the 'read' bind.
+
+    Anything flushed goes to the primary, and requests that never call
+    use_read_replica() are unaffected, so write paths keep read-your-writes
+    consistency.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get('read_only'):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,135 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it no variants are offered
+    Image = None
+
+VARIANT_NAME = re.compile(r'^(?P<digest>[0-9a-f]{64})_(?P<width>\d+)w\.(?P<format>[a-z0-9]+)$')
+
+
+class DerivativeGenerator:
+    """Produces resized copies of uploaded images.
+
+    Variants live in ``<root>/variants`` as ``<digest>_<width>w.<format>``.
+    Files on disk are the cache and the record of what exists: only
+    generated variants are listed, so sources that aren't images never get
+    URLs. Generation runs on a background pool after upload and lazily for
+    any variant that is requested before it exists. Concurrent requests for
+    the same variant share one generation job.
+    """
+
+    def __init__(self, root, widths=(320, 800, 1600), image_format='webp',
+                 quality=80, workers=2, on_generated=None):
+        self.root = os.path.join(root, 'variants')
+        self.widths = tuple(widths)
+        self.format = image_format
+        self.quality = quality
+        self.on_generated = on_generated
+        self.generated = 0
+        self.failed = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='derivatives')
+        self._pending = {}
+        # Re-entrant: a done callback can fire inline while _submit holds it
+        self._lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def available(self):
+        return Image is not None
+
+    def variant_name(self, digest, width):
+        return f'{digest}_{width}w.{self.format}'
+
+    def variant_urls(self, digest, url_prefix):
+        """URLs keyed by width for the variants of ``digest`` generated so far."""
+        if not self.available:
+            return {}
+        urls = {}
+        for width in self.widths:
+            name = self.variant_name(digest, width)
+            if os.path.exists(self.path(name)):
+                urls[str(width)] = f'{url_prefix}variants/{name}'
+        return urls
+
+    def parse_variant(self, filename):
+        """Return (digest, width) for a valid variant name, else None."""
+        match = VARIANT_NAME.match(filename)
+        if not match or match['format'] != self.format or int(match['width']) not in self.widths:
+            return None
+        return match['digest'], int(match['width'])
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def schedule(self, source_path, digest):
+        """Queue every configured width for ``source_path`` in the background."""
+        if not self.available:
+            return []
+        return [self._submit(source_path, digest, width) for width in self.widths]
+
+    def ensure(self, source_path, digest, width, timeout=30):
+        """Return the variant path, generating it now if it doesn't exist yet."""
+        path = self.path(self.variant_name(digest, width))
+        if os.path.exists(path):
+            return path
+        return self._submit(source_path, digest, width).result(timeout=timeout)
+
+    def _submit(self, source_path, digest, width):
+        name = self.variant_name(digest, width)
+        with self._lock:
+            future = self._pending.get(name)
+            if future is None:
+                future = self._pool.submit(self._generate, source_path, digest, width)
+                self._pending[name] = future
+                future.add_done_callback(lambda _: self._forget(name))
+            return future
+
+    def _forget(self, name):
+        with self._lock:
+            self._pending.pop(name, None)
+
+    def _generate(self, source_path, digest, width):
+        name = self.variant_name(digest, width)
+        path = self.path(name)
+        if os.path.exists(path):
+            return path
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with Image.open(source_path) as image:
+                image.thumbnail((width, width * 4))  # never upscales
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA')
+                image.save(tmp_path, format=self.format.upper(), quality=self.quality)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # Not a decodable image, an unsupported format, or one whose pixel
+            # count is past Pillow's decompression bomb limit; nothing to serve
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.failed += 1
+            return None
+        self.generated += 1
+        if self.on_generated:
+            self.on_generated(digest, width, name)
+        return path
+
+    def delete_variants(self, digest):
+        for width in self.widths:
+            try:
+                os.remove(self.path(self.variant_name(digest, width)))
+            except FileNotFoundError:
+                pass
+
+    def info(self):
+        return {
+            'available': self.available,
+            'widths': list(self.widths),
+            'format': self.format,
+            'generated': self.generated,
+            'failed': self.failed,
+            'pending': len(self._pending)
+        }
@@ -0,0 +1,51 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder is used instead
+    orjson = None
+
+_FAST_ARGUMENTS = {'indent', 'separators'}
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is installed.
+
+    Output follows DefaultJSONProvider: keys are sorted when ``sort_keys`` is
+    set, dates go through ``default`` (so they still render as HTTP dates)
+    and debug responses are indented. Anything orjson refuses, such as
+    integers wider than 64 bits or dump arguments it has no option for, is
+    handed to the stdlib encoder.
+    """
+
+    available = orjson is not None
+
+    def encode(self, obj, **kwargs):
+        """``obj`` as UTF-8 encoded JSON bytes."""
+        if self.available and kwargs.keys() <= _FAST_ARGUMENTS and kwargs.get('indent') in (None, 2):
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj, **kwargs):
+        return self.encode(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        if self.available and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args = {'indent': 2}
+        else:
+            dump_args = {'separators': (',', ':')}
+        return self._app.response_class(self.encode(obj, **dump_args) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,171 @@
+import os
+import threading
+import traceback
+from collections import deque
+
+# Upper bounds in seconds, as used by Prometheus client libraries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction ``q`` of observations fall."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= target:
+                return bound
+        return float('inf')
+
+
+class RouteStats:
+    def __init__(self, buckets):
+        self.latency = Histogram(buckets)
+        self.db_time = Histogram(buckets)
+        self.queries = 0
+        self.statuses = {}
+
+
+class RequestMetrics:
+    """Aggregates per-route latency, SQL counts and slow queries.
+
+    Requests are keyed by (method, url rule) so path parameters don't create
+    a series per post. Slow queries keep the statement, a truncated rendering
+    of the parameters and the application frame that issued them.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, slow_query_threshold=0.1,
+                 slow_query_log_size=100, source_root=None):
+        self.buckets = tuple(buckets)
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_queries = deque(maxlen=slow_query_log_size)
+        self.source_root = source_root
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, method, route, status, duration, db_time, queries):
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = RouteStats(self.buckets)
+            stats.latency.observe(duration)
+            stats.db_time.observe(db_time)
+            stats.queries += queries
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def is_slow(self, duration):
+        return self.slow_query_threshold is not None and duration >= self.slow_query_threshold
+
+    def record_slow_query(self, statement, parameters, duration, route=None):
+        entry = {
+            'statement': statement,
+            'parameters': _truncate(repr(parameters)),
+            'duration_ms': round(duration * 1000, 2),
+            'route': route,
+            'call_site': self.call_site()
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+        return entry
+
+    def call_site(self):
+        """The innermost application frame that called into the database library.
+
+        Called from an engine event hook, so the frames nearest the top are
+        the hook itself and SQLAlchemy; the first application frame below the
+        library frames is the code that issued the query.
+        """
+        in_library = False
+        for frame in reversed(traceback.extract_stack()):
+            if f'{os.sep}site-packages{os.sep}' in frame.filename:
+                in_library = True
+                continue
+            if not in_library:
+                continue
+            if self.source_root and not frame.filename.startswith(self.source_root):
+                continue
+            return f'{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}'
+        return None
+
+    def summary(self):
+        with self._lock:
+            routes = []
+            for (method, route), stats in sorted(self._routes.items(), key=lambda item: item[0][1]):
+                requests = stats.latency.count
+                routes.append({
+                    'method': method,
+                    'route': route,
+                    'requests': requests,
+                    'statuses': dict(stats.statuses),
+                    'avg_ms': round(stats.latency.sum / requests * 1000, 2),
+                    'p95_ms': stats.latency.quantile(0.95) * 1000,
+                    'avg_db_ms': round(stats.db_time.sum / requests * 1000, 2),
+                    'avg_queries': round(stats.queries / requests, 2)
+                })
+            return {'routes': routes, 'slow_queries': list(self.slow_queries)}
+
+    def render_prometheus(self, prefix='blog'):
+        lines = []
+        with self._lock:
+            items = sorted(self._routes.items(), key=lambda item: item[0][1])
+            lines += [f'# HELP {prefix}_requests_total Requests handled, by route and status.',
+                      f'# TYPE {prefix}_requests_total counter']
+            for (method, route), stats in items:
+                for status, count in sorted(stats.statuses.items()):
+                    labels = _labels(method=method, route=route, status=status)
+                    lines.append(f'{prefix}_requests_total{{{labels}}} {count}')
+            for name, attr, help_text in (
+                ('request_duration_seconds', 'latency', 'Wall time per request.'),
+                ('request_db_seconds', 'db_time', 'Time spent in SQL per request.')
+            ):
+                lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} histogram']
+                for (method, route), stats in items:
+                    lines += _histogram_lines(f'{prefix}_{name}', getattr(stats, attr),
+                                              method=method, route=route)
+            lines += [f'# HELP {prefix}_request_queries_total SQL statements issued by requests.',
+                      f'# TYPE {prefix}_request_queries_total counter']
+            for (method, route), stats in items:
+                labels = _labels(method=method, route=route)
+                lines.append(f'{prefix}_request_queries_total{{{labels}}} {stats.queries}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self.slow_queries.clear()
+
+
+def _truncate(text, limit=500):
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _histogram_lines(name, histogram, **labels):
+    lines = []
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        lines.append(f'{name}_bucket{{{_labels(**labels, le=bound)}}} {count}')
+    lines.append(f'{name}_bucket{{{_labels(**labels, le="+Inf")}}} {histogram.count}')
+    lines.append(f'{name}_sum{{{_labels(**labels)}}} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{{{_labels(**labels)}}} {histogram.count}')
+    return lines
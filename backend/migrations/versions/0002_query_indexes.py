@@ -0,0 +1,44 @@
+"""indexes for the listing, feed, comment and tag-filter queries
+
+Revision ID: 0002_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 03:10:04.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_query_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index('ix_post_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_post_author_id_created_at', ['author_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.create_index('ix_comment_post_id_created_at_id', ['post_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_comment_author_id', ['author_id'], unique=False)
+        batch_op.create_index('ix_comment_created_at_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('post_tags', schema=None) as batch_op:
+        batch_op.create_index('ix_post_tags_tag_id_post_id', ['tag_id', 'post_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post_tags', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_tags_tag_id_post_id')
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_created_at_id')
+        batch_op.drop_index('ix_comment_author_id')
+        batch_op.drop_index('ix_comment_post_id_created_at_id')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_author_id_created_at')
+        batch_op.drop_index('ix_post_created_at_id')
@@ -0,0 +1,58 @@
+"""denormalized engagement counters on posts and users, backfilled
+
+Revision ID: 0003_engagement_counters
+Revises: 0002_query_indexes
+Create Date: 2026-10-18 09:12:40.511207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_engagement_counters'
+down_revision = '0002_query_indexes'
+branch_labels = None
+depends_on = None
+
+COUNTERS = {
+    'user': ('posts_count', 'comments_count', 'comments_received'),
+    'post': ('comments_count',)
+}
+
+user = sa.table('user', sa.column('id'), sa.column('posts_count'),
+                sa.column('comments_count'), sa.column('comments_received'))
+post = sa.table('post', sa.column('id'), sa.column('author_id'), sa.column('comments_count'))
+comment = sa.table('comment', sa.column('id'), sa.column('author_id'), sa.column('post_id'))
+
+
+def upgrade():
+    # Databases built by db.create_all() after the counters were added
+    # already have the columns; only the backfill applies to them
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in COUNTERS.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name in columns:
+                if name not in existing:
+                    batch_op.add_column(sa.Column(name, sa.Integer(), server_default='0', nullable=False))
+
+    # Same values as backfill_counters(), without the app's models
+    op.execute(post.update().values(comments_count=sa.select(sa.func.count(comment.c.id))
+                                    .where(comment.c.post_id == post.c.id).scalar_subquery()))
+    op.execute(user.update().values(
+        posts_count=sa.select(sa.func.count(post.c.id))
+        .where(post.c.author_id == user.c.id).scalar_subquery(),
+        comments_count=sa.select(sa.func.count(comment.c.id))
+        .where(comment.c.author_id == user.c.id).scalar_subquery(),
+        comments_received=sa.select(sa.func.count(comment.c.id))
+        .select_from(comment.join(post, comment.c.post_id == post.c.id))
+        .where(post.c.author_id == user.c.id).scalar_subquery()
+    ))
+
+
+def downgrade():
+    for table, columns in COUNTERS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name in columns:
+                batch_op.drop_column(name)
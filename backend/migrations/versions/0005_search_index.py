@@ -0,0 +1,40 @@
+"""full-text search index (SQLite FTS5), built from the posts table
+
+Revision ID: 0005_search_index
+Revises: 0004_activity_rollups
+Create Date: 2026-10-18 09:38:52.640118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_search_index'
+down_revision = '0004_activity_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Search is only offered on SQLite
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS post_search "
+        "USING fts5(title, content, tags, tokenize='porter unicode61')"
+    )
+    # Same contents as rebuild_search_index()
+    op.execute("DELETE FROM post_search")
+    op.execute(
+        "INSERT INTO post_search (rowid, title, content, tags) "
+        "SELECT post.id, post.title, post.content, "
+        "COALESCE((SELECT group_concat(tag.name, ' ') FROM post_tags "
+        "JOIN tag ON tag.id = post_tags.tag_id WHERE post_tags.post_id = post.id), '') "
+        "FROM post"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS post_search")
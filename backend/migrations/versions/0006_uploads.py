@@ -0,0 +1,46 @@
+"""upload reference counts
+
+Revision ID: 0006_uploads
+Revises: 0005_search_index
+Create Date: 2026-10-18 09:44:17.093526
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_uploads'
+down_revision = '0005_search_index'
+branch_labels = None
+depends_on = None
+
+upload = sa.table('upload', sa.column('created_at'), sa.column('last_uploaded_at'))
+
+
+def upgrade():
+    # Uploads stored before content addressing keep their names and have no
+    # row here; only hashed uploads are reference counted
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('upload'):
+        op.create_table('upload',
+        sa.Column('filename', sa.String(length=80), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_uploaded_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('filename')
+        )
+    elif 'last_uploaded_at' not in {column['name'] for column in inspector.get_columns('upload')}:
+        # Created by db.create_all() before re-uploads were tracked
+        with op.batch_alter_table('upload', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('last_uploaded_at', sa.DateTime(), nullable=True))
+        op.execute(upload.update().values(last_uploaded_at=upload.c.created_at))
+    if inspector.has_table('image_variant'):
+        # Builds before migrations recorded generated variants here; the
+        # variant files themselves are the record now
+        op.drop_table('image_variant')
+
+
+def downgrade():
+    op.drop_table('upload')
@@ -0,0 +1,36 @@
+"""widen user.password_hash for the configurable KDF's longer hashes
+
+Revision ID: 0007_password_hash_length
+Revises: 0006_uploads
+Create Date: 2026-10-18 09:50:26.718835
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_password_hash_length'
+down_revision = '0006_uploads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    column = next(column for column in sa.inspect(op.get_bind()).get_columns('user')
+                  if column['name'] == 'password_hash')
+    if (getattr(column['type'], 'length', None) or 0) >= 255:
+        return
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+                              existing_type=sa.String(length=120),
+                              type_=sa.String(length=255),
+                              existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+                              existing_type=sa.String(length=255),
+                              type_=sa.String(length=120),
+                              existing_nullable=False)
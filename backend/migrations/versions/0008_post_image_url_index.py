@@ -0,0 +1,26 @@
+"""index post.image_url for the posts showing an upload
+
+Revision ID: 0008_post_image_url_index
+Revises: 0007_password_hash_length
+Create Date: 2026-10-18 14:05:12.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_post_image_url_index'
+down_revision = '0007_password_hash_length'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index('ix_post_image_url', ['image_url'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_image_url')
@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when too many hash operations are already queued."""
+
+
+def hash_prefix(method):
+    """The ``method:params`` prefix werkzeug writes for ``method``, worked
+    out from its defaults rather than by running the KDF."""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes 2 arguments.")
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a bounded worker pool.
+
+    The KDF is deliberately slow, so running it on request workers lets a
+    burst of logins starve cheap read traffic. Work is handed to a small pool
+    instead, and once ``max_pending`` operations are queued or running new
+    ones fail fast with HasherBusy so the caller can answer 503.
+
+    ``workers=0`` hashes inline on the calling thread (no pool).
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', workers=2, max_pending=32,
+                 executor='thread', timeout=30):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.rejected = 0
+        self.rehashed = 0
+        self._counts_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        if workers:
+            pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+            self._pool = pool_class(max_workers=workers)
+        # Hash prefix (method and cost parameters) produced by the current settings
+        self.current_prefix = hash_prefix(method)
+
+    def _run(self, fn, *args):
+        if self._pool is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            with self._counts_lock:
+                self.rejected += 1
+            raise HasherBusy()
+        try:
+            return self._pool.submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.current_prefix
+
+    def record_rehash(self):
+        with self._counts_lock:
+            self.rehashed += 1
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def info(self):
+        with self._counts_lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'rejected': self.rejected,
+                'rehashed': self.rehashed
+            }
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import re
+import tempfile
+
+HASHED_NAME = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]{1,10})?$')
+
+
+class ContentStore:
+    """Stores uploaded files under the SHA-256 of their contents.
+
+    Bodies are streamed to a temporary file in chunks while being hashed, then
+    atomically renamed to ``<sha256><ext>``. Identical content maps to the same
+    name, so re-uploads take no extra space and every URL is immutable.
+    """
+
+    def __init__(self, root, chunk_size=64 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def exists(self, filename):
+        return os.path.exists(self.path(filename))
+
+    def save(self, stream, extension=''):
+        """Write ``stream`` to the store; returns (filename, digest, size, created)."""
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            filename = digest + extension
+            if self.exists(filename):
+                os.remove(tmp_path)
+                return filename, digest, size, False
+            os.replace(tmp_path, self.path(filename))
+            return filename, digest, size, True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, filename):
+        try:
+            os.remove(self.path(filename))
+        except FileNotFoundError:
+            pass
+
+
+def normalize_extension(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if re.fullmatch(r'\.[a-z0-9]{1,10}', extension):
+        return extension
+    return ''
+
+
+def is_hashed_name(filename):
+    return bool(HASHED_NAME.match(filename))
@@ -0,0 +1,116 @@
+import bisect
+import heapq
+import math
+import threading
+import time
+
+
+class TagIndex:
+    """In-memory tag statistics: post counts, prefix search and trending.
+
+    Names are kept in a sorted list of lowercase keys, so a prefix lookup is
+    two binary searches plus a top-``limit`` pick over the matching range.
+
+    Trending scores decay exponentially with ``half_life`` seconds. Each use
+    of a tag adds ``exp((t - t0) / tau)`` against a fixed reference time t0,
+    which ranks identically to a score decayed to "now" without touching
+    every tag as time passes. The reference moves forward (rescaling all
+    scores) before the exponent gets large enough to overflow.
+    """
+
+    REBASE_EXPONENT = 500
+
+    def __init__(self, half_life=24 * 3600):
+        self.half_life = half_life
+        self.tau = half_life / math.log(2)
+        self.loaded_at = None
+        self._lock = threading.Lock()
+        self._reset(time.time())
+
+    def _reset(self, reference):
+        self._ids = {}        # name -> tag id
+        self._counts = {}     # name -> number of posts
+        self._scores = {}     # name -> trending weight relative to self._t0
+        self._keys = []       # sorted (lowercase name, name)
+        self._t0 = reference
+
+    def load(self, tags, usages=(), now=None):
+        """Replace the contents from ``(id, name, post_count)`` rows and
+        ``(name, timestamp)`` tag usages that feed the trending scores."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._reset(now)
+            for tag_id, name, count in tags:
+                self._ids[name] = tag_id
+                self._counts[name] = count
+            self._keys = sorted((name.lower(), name) for name in self._ids)
+            for name, timestamp in usages:
+                self._add_score(name, timestamp)
+            self.loaded_at = now
+
+    def apply(self, changes):
+        """Apply ``(tag_id, name, delta, timestamp)`` post-tag changes."""
+        with self._lock:
+            for tag_id, name, delta, timestamp in changes:
+                if name not in self._ids:
+                    self._ids[name] = tag_id
+                    self._counts[name] = 0
+                    bisect.insort(self._keys, (name.lower(), name))
+                self._counts[name] = max(self._counts[name] + delta, 0)
+                # Removals subtract the weight the usage was added with
+                self._add_score(name, timestamp, delta)
+                if self._scores[name] <= 1e-12:
+                    del self._scores[name]
+
+    def _add_score(self, name, timestamp, weight=1):
+        exponent = (timestamp - self._t0) / self.tau
+        if exponent > self.REBASE_EXPONENT:
+            self._rebase(timestamp)
+            exponent = 0.0
+        self._scores[name] = self._scores.get(name, 0.0) + weight * math.exp(exponent)
+
+    def _rebase(self, reference):
+        factor = math.exp((self._t0 - reference) / self.tau)
+        self._scores = {name: score * factor for name, score in self._scores.items()
+                        if score * factor > 1e-12}
+        self._t0 = reference
+
+    def _entry(self, name):
+        return {'id': self._ids[name], 'name': name, 'post_count': self._counts[name]}
+
+    def search(self, prefix, limit=10):
+        """Tags starting with ``prefix`` (case-insensitive), most used first."""
+        key = prefix.lower()
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (key,))
+            end = bisect.bisect_left(self._keys, (key + '￿',))
+            names = (name for _, name in self._keys[start:end])
+            best = heapq.nsmallest(limit, names, key=lambda name: (-self._counts[name], name))
+            return [self._entry(name) for name in best]
+
+    def all(self, limit=None, include_unused=True):
+        with self._lock:
+            names = [name for name in self._ids if include_unused or self._counts[name]]
+            names.sort(key=lambda name: (-self._counts[name], name))
+            return [self._entry(name) for name in names[:limit]]
+
+    def trending(self, limit=10, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            best = heapq.nlargest(limit, self._scores.items(), key=lambda item: item[1])
+            decay = math.exp((self._t0 - now) / self.tau)
+            return [dict(self._entry(name), score=round(score * decay, 4))
+                    for name, score in best if name in self._ids]
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def info(self):
+        with self._lock:
+            return {
+                'tags': len(self._ids),
+                'trending_tags': len(self._scores),
+                'half_life_seconds': self.half_life,
+                'loaded_at': self.loaded_at
+            }
@@ -0,0 +1,173 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class QueueFull(Exception):
+    """Raised when the write-behind queue already holds ``max_pending`` items."""
+
+
+class WriteBehindQueue:
+    """Buffers writes in memory and applies them in batches on one thread.
+
+    ``submit`` returns a ticket as soon as the item is queued. A single
+    flusher thread collects up to ``max_batch`` items, or whatever arrived
+    within ``max_delay`` seconds of the first one, and passes them to
+    ``flush`` in submission order, so tickets and writes share one order.
+
+    Guarantees: a failed batch is retried ``retries`` times and then written
+    item by item, so one bad row can't take the rest of the batch with it.
+    ``close`` stops intake and drains everything already accepted. Items
+    still queued when the process dies without closing the queue are lost.
+
+    The flusher thread starts on first use, so a queue created before a
+    forking server forks still gets a thread in each worker.
+
+    With ``stamp_field`` set, ``submit`` writes the current UTC time into
+    that key of each (dict) item while it holds the lock that hands out
+    tickets, so timestamps never disagree with ticket or insert order.
+    """
+
+    def __init__(self, flush, max_batch=200, max_delay=0.05, max_pending=10000, retries=3,
+                 name='write-behind', stamp_field=None):
+        self.flush = flush
+        self.stamp_field = stamp_field
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.retries = retries
+        self.name = name
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_written_ticket = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._tickets = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def submit(self, item):
+        """Queue ``item`` and return its ticket; raises QueueFull when at capacity."""
+        with self._lock:
+            if self._closed:
+                raise QueueFull()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            if self.stamp_field:
+                item[self.stamp_field] = datetime.utcnow()
+            ticket = next(self._tickets)
+            try:
+                self._queue.put_nowait((ticket, item))
+            except queue.Full:
+                self.rejected += 1
+                raise QueueFull() from None
+            self.accepted += 1
+            return ticket
+
+    def drain(self):
+        """Block until every item submitted so far has been written (or failed)."""
+        self._queue.join()
+
+    def close(self, timeout=30):
+        """Stop accepting items, write the ones already queued and stop the thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._write(batch)
+        # Closed: nothing new can arrive, so write whatever is left
+        leftover = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._queue.task_done()
+                continue
+            leftover.append(entry)
+        for start in range(0, len(leftover), self.max_batch):
+            self._write(leftover[start:start + self.max_batch])
+
+    def _write(self, batch):
+        try:
+            if not self._attempt([item for _, item in batch]):
+                # Isolate the rows that keep failing
+                for entry in batch:
+                    if not self._attempt([entry[1]], retries=0):
+                        self.failed += 1
+                        logger.error('%s: dropping ticket %s after repeated failures', self.name, entry[0])
+                    else:
+                        self.written += 1
+            else:
+                self.written += len(batch)
+            self.batches += 1
+            self.last_written_ticket = batch[-1][0]
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _attempt(self, items, retries=None):
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                self.flush(items)
+                return True
+            except Exception:
+                logger.exception('%s: writing %d items failed (attempt %d)', self.name, len(items), attempt + 1)
+                if attempt < retries:
+                    time.sleep(min(0.05 * 2 ** attempt, 1.0))
+        return False
+
+    def info(self):
+        return {
+            'pending': self._queue.qsize(),
+            'max_pending': self.max_pending,
+            'max_batch': self.max_batch,
+            'max_delay_ms': round(self.max_delay * 1000),
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches,
+            'last_written_ticket': self.last_written_ticket
+        }
@@ -82,6 +82,8 @@ export const AuthProvider = ({ children }) => {
   };
 
   const logout = () => {
+    // Revoke the token server-side; the local session ends either way
+    authAPI.logout().catch(() => {});
     localStorage.removeItem('token');
     delete api.defaults.headers.common['Authorization'];
     setUser(null);
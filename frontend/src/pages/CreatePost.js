@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import { postsAPI, uploadAPI } from '../services/api';
+import { postsAPI, tagsAPI, uploadAPI } from '../services/api';
 
 const CreatePost = () => {
   const { isAuthenticated } = useAuth();
@@ -15,6 +15,7 @@ const CreatePost = () => {
   const [imageUrl, setImageUrl] = useState('');
   const [uploading, setUploading] = useState(false);
   const [submitting, setSubmitting] = useState(false);
+  const [tagSuggestions, setTagSuggestions] = useState([]);
 
   const handleChange = (e) => {
     setFormData({
@@ -23,6 +24,29 @@ const CreatePost = () => {
     });
   };
 
+  // Suggest existing tags for the fragment after the last comma
+  const handleTagsChange = async (e) => {
+    handleChange(e);
+    const fragment = e.target.value.split(',').pop().trim();
+    if (!fragment) {
+      setTagSuggestions([]);
+      return;
+    }
+    try {
+      const response = await tagsAPI.suggest(fragment);
+      setTagSuggestions(response.data.map(tag => tag.name));
+    } catch (error) {
+      console.error('Error fetching tag suggestions:', error);
+    }
+  };
+
+  const applyTagSuggestion = (name) => {
+    const parts = formData.tags.split(',').map(tag => tag.trim());
+    parts[parts.length - 1] = name;
+    setFormData({ ...formData, tags: parts.join(', ') + ', ' });
+    setTagSuggestions([]);
+  };
+
   const handleImageChange = (e) => {
     const file = e.target.files[0];
     if (file) {
@@ -118,10 +142,24 @@ const CreatePost = () => {
               type="text"
               name="tags"
               value={formData.tags}
-              onChange={handleChange}
+              onChange={handleTagsChange}
               className="form-input"
               placeholder="e.g., technology, programming, web development"
             />
+            {tagSuggestions.length > 0 && (
+              <div className="mt-2">
+                {tagSuggestions.map(name => (
+                  <button
+                    key={name}
+                    type="button"
+                    onClick={() => applyTagSuggestion(name)}
+                    className="tag bg-blue-100 text-blue-800 mr-2"
+                  >
+                    {name}
+                  </button>
+                ))}
+              </div>
+            )}
           </div>
 
           <div className="form-group">
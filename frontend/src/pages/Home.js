@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { postsAPI } from '../services/api';
+import { postsAPI, searchAPI, tagsAPI } from '../services/api';
 
 const Home = () => {
   const [posts, setPosts] = useState([]);
@@ -9,16 +9,30 @@ const Home = () => {
   const [totalPages, setTotalPages] = useState(1);
   const [availableTags, setAvailableTags] = useState([]);
   const [selectedTag, setSelectedTag] = useState('');
+  const [trendingTags, setTrendingTags] = useState([]);
+  const [searchInput, setSearchInput] = useState('');
+  const [searchQuery, setSearchQuery] = useState('');
 
   useEffect(() => {
     fetchPosts();
     fetchTags();
-  }, [currentPage, selectedTag]);
+  }, [currentPage, selectedTag, searchQuery]);
+
+  useEffect(() => {
+    fetchTrendingTags();
+  }, []);
 
   const fetchPosts = async () => {
     try {
       setLoading(true);
-      const params = { page: currentPage, per_page: 10 };
+      if (searchQuery) {
+        const response = await searchAPI.search(searchQuery, { page: currentPage, per_page: 10 });
+        setPosts(response.data.results);
+        // Search doesn't count its matches; a full page means there may be another
+        setTotalPages(response.data.results.length === 10 ? currentPage + 1 : currentPage);
+        return;
+      }
+      const params = { page: currentPage, per_page: 10, excerpt: 200 };
       if (selectedTag) {
         params.tag = selectedTag;
       }
@@ -41,6 +55,15 @@ const Home = () => {
     }
   };
 
+  const fetchTrendingTags = async () => {
+    try {
+      const response = await tagsAPI.getTrending(8);
+      setTrendingTags(response.data.map(tag => tag.name));
+    } catch (error) {
+      console.error('Error fetching trending tags:', error);
+    }
+  };
+
   const formatDate = (dateString) => {
     return new Date(dateString).toLocaleDateString('en-US', {
       year: 'numeric',
@@ -61,6 +84,8 @@ const Home = () => {
 
   const handleTagFilter = (tag) => {
     setSelectedTag(tag);
+    setSearchQuery('');
+    setSearchInput('');
     setCurrentPage(1); // Reset to first page when filtering
   };
 
@@ -69,6 +94,19 @@ const Home = () => {
     setCurrentPage(1);
   };
 
+  const handleSearch = (e) => {
+    e.preventDefault();
+    setSearchQuery(searchInput.trim());
+    setSelectedTag('');
+    setCurrentPage(1);
+  };
+
+  const clearSearch = () => {
+    setSearchQuery('');
+    setSearchInput('');
+    setCurrentPage(1);
+  };
+
   return (
     <div className="container">
       <div className="flex justify-between items-center mb-6">
@@ -78,6 +116,25 @@ const Home = () => {
         </Link>
       </div>
 
+      {/* Search */}
+      <form onSubmit={handleSearch} className="flex gap-2 mb-6">
+        <input
+          type="search"
+          value={searchInput}
+          onChange={(e) => setSearchInput(e.target.value)}
+          placeholder="Search posts..."
+          className="form-input"
+        />
+        <button type="submit" className="btn btn-primary">
+          Search
+        </button>
+        {searchQuery && (
+          <button type="button" onClick={clearSearch} className="btn btn-secondary">
+            Clear
+          </button>
+        )}
+      </form>
+
       {/* Tag Filter */}
       <div className="tag-filter-section">
         <div className="tag-filter-header">
@@ -95,6 +152,24 @@ const Home = () => {
           )}
         </div>
         
+        {trendingTags.length > 0 && (
+          <div className="tag-filter-container">
+            <p className="text-sm text-gray-500 mb-2">Trending</p>
+            <div className="tag-grid">
+              {trendingTags.map(tag => (
+                <button
+                  key={tag}
+                  onClick={() => handleTagFilter(tag)}
+                  className={`tag-filter-item ${selectedTag === tag ? 'tag-filter-active' : ''}`}
+                >
+                  <span className="tag-icon">🔥</span>
+                  <span className="tag-text">{tag}</span>
+                </button>
+              ))}
+            </div>
+          </div>
+        )}
+
         <div className="tag-filter-container">
           {availableTags.length > 0 ? (
             <div className="tag-grid">
@@ -124,19 +199,33 @@ const Home = () => {
             </div>
           </div>
         )}
+
+        {searchQuery && (
+          <div className="filter-status">
+            <div className="filter-status-content">
+              <span className="filter-icon">🔍</span>
+              <span>Showing posts matching: <strong>{searchQuery}</strong></span>
+            </div>
+          </div>
+        )}
       </div>
 
       {posts.length === 0 ? (
         <div className="card text-center">
           <h2>No posts found</h2>
-          <p>Be the first to create a blog post!</p>
+          <p>{searchQuery ? 'Try different search terms.' : 'Be the first to create a blog post!'}</p>
         </div>
       ) : (
         <div className="grid gap-6">
           {posts.map(post => (
             <div key={post.id} className="card">
               <div className="flex justify-between items-start mb-4">
-                <h2 className="text-2xl font-bold">{post.title}</h2>
+                {/* Search highlights arrive HTML-escaped with only <mark> tags added */}
+                {post.highlighted_title ? (
+                  <h2 className="text-2xl font-bold" dangerouslySetInnerHTML={{ __html: post.highlighted_title }} />
+                ) : (
+                  <h2 className="text-2xl font-bold">{post.title}</h2>
+                )}
                 <span className="text-sm text-gray-500">
                   {formatDate(post.created_at)}
                 </span>
@@ -144,14 +233,21 @@ const Home = () => {
               
               {post.image_url && (
                 <img 
-                  src={`http://localhost:8000${post.image_url}`} 
+                  src={`http://localhost:8000${post.image_variants?.['320'] || post.image_url}`} 
+                  srcSet={post.image_variants?.['800'] && `http://localhost:8000${post.image_variants['320']} 320w, http://localhost:8000${post.image_variants['800']} 800w`}
+                  sizes="(max-width: 640px) 100vw, 320px"
+                  loading="lazy"
                   alt={post.title}
                   className="post-image-thumbnail mb-4"
                 />
               )}
               
               <div className="mb-4">
-                <p className="text-gray-700">{post.content.substring(0, 200)}...</p>
+                {post.snippet ? (
+                  <p className="text-gray-700" dangerouslySetInnerHTML={{ __html: post.snippet }} />
+                ) : (
+                  <p className="text-gray-700">{post.excerpt}</p>
+                )}
               </div>
               
               <div className="flex justify-between items-center">
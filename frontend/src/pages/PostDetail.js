@@ -7,6 +7,10 @@ const PostDetail = () => {
   const { id } = useParams();
   const { isAuthenticated } = useAuth();
   const [post, setPost] = useState(null);
+  const [comments, setComments] = useState([]);
+  const [commentsCursor, setCommentsCursor] = useState(null);
+  const [hasMoreComments, setHasMoreComments] = useState(false);
+  const [loadingComments, setLoadingComments] = useState(false);
   const [loading, setLoading] = useState(true);
   const [newComment, setNewComment] = useState('');
   const [submitting, setSubmitting] = useState(false);
@@ -20,6 +24,9 @@ const PostDetail = () => {
       setLoading(true);
       const response = await postsAPI.getPost(id);
       setPost(response.data);
+      setComments(response.data.comments);
+      setCommentsCursor(response.data.comments_next_cursor);
+      setHasMoreComments(response.data.comments_has_more);
     } catch (error) {
       console.error('Error fetching post:', error);
     } finally {
@@ -27,6 +34,23 @@ const PostDetail = () => {
     }
   };
 
+  // Fetches the comments after the last one shown: the next page while
+  // paging, or just the new ones once the end of the thread is reached
+  const fetchMoreComments = async () => {
+    try {
+      setLoadingComments(true);
+      const params = commentsCursor ? { cursor: commentsCursor } : {};
+      const response = await commentsAPI.getComments(id, params);
+      setComments(previous => [...previous, ...response.data.comments]);
+      setCommentsCursor(response.data.next_cursor);
+      setHasMoreComments(response.data.has_more);
+    } catch (error) {
+      console.error('Error fetching comments:', error);
+    } finally {
+      setLoadingComments(false);
+    }
+  };
+
   const handleSubmitComment = async (e) => {
     e.preventDefault();
     if (!newComment.trim()) return;
@@ -35,8 +59,11 @@ const PostDetail = () => {
       setSubmitting(true);
       await commentsAPI.createComment(id, { content: newComment });
       setNewComment('');
-      // Refresh the post to get updated comments
-      await fetchPost();
+      setPost(previous => ({ ...previous, comments_count: previous.comments_count + 1 }));
+      // Pull in comments newer than the ones already loaded
+      if (!hasMoreComments) {
+        await fetchMoreComments();
+      }
     } catch (error) {
       console.error('Error submitting comment:', error);
     } finally {
@@ -90,7 +117,9 @@ const PostDetail = () => {
 
         {post.image_url && (
           <img 
-            src={`http://localhost:8000${post.image_url}`} 
+            src={`http://localhost:8000${post.image_variants?.['800'] || post.image_url}`} 
+            srcSet={post.image_variants?.['1600'] && `http://localhost:8000${post.image_variants['800']} 800w, http://localhost:8000${post.image_variants['1600']} 1600w`}
+            sizes="(max-width: 900px) 100vw, 900px"
             alt={post.title}
             className="post-image mb-6"
           />
@@ -111,7 +140,7 @@ const PostDetail = () => {
 
       {/* Comments Section */}
       <div className="card">
-        <h2 className="text-2xl font-bold mb-4">Comments ({post.comments.length})</h2>
+        <h2 className="text-2xl font-bold mb-4">Comments ({post.comments_count})</h2>
         
         {/* Add Comment Form */}
         {isAuthenticated ? (
@@ -143,11 +172,11 @@ const PostDetail = () => {
         )}
 
         {/* Comments List */}
-        {post.comments.length === 0 ? (
+        {comments.length === 0 ? (
           <p className="text-gray-500">No comments yet. Be the first to comment!</p>
         ) : (
           <div className="space-y-4">
-            {post.comments.map(comment => (
+            {comments.map(comment => (
               <div key={comment.id} className="border-l-4 border-gray-200 pl-4">
                 <div className="flex items-center gap-2 mb-2">
                   <span className="font-semibold">{comment.author.username}</span>
@@ -160,6 +189,16 @@ const PostDetail = () => {
             ))}
           </div>
         )}
+
+        {hasMoreComments && (
+          <button
+            onClick={fetchMoreComments}
+            disabled={loadingComments}
+            className="btn btn-secondary mt-4"
+          >
+            {loadingComments ? 'Loading...' : 'Load more comments'}
+          </button>
+        )}
       </div>
     </div>
   );
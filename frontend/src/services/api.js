@@ -10,6 +10,7 @@ const api = axios.create({
 export const authAPI = {
   login: (credentials) => api.post('/login', credentials),
   register: (userData) => api.post('/register', userData),
+  logout: () => api.post('/logout'),
   getCurrentUser: () => api.get('/user'),
 };
 
@@ -25,12 +26,20 @@ export const postsAPI = {
 
 // Comments API
 export const commentsAPI = {
+  getComments: (postId, params = {}) => api.get(`/posts/${postId}/comments`, { params }),
   createComment: (postId, commentData) => api.post(`/posts/${postId}/comments`, commentData),
 };
 
 // Tags API
 export const tagsAPI = {
   getTags: () => api.get('/tags'),
+  suggest: (prefix, limit = 8) => api.get('/tags', { params: { prefix, limit } }),
+  getTrending: (limit = 10) => api.get('/tags/trending', { params: { limit } }),
+};
+
+// Search API
+export const searchAPI = {
+  search: (q, params = {}) => api.get('/search', { params: { q, ...params } }),
 };
 
 // Upload API